@@ -0,0 +1,511 @@
+"""Solve jobs on workers spread over several machines.
+
+A broker holds a queue of jobs, and talks newline delimited JSON over TCP:
+
+    python distributed.py broker --host 0.0.0.0 --port 8765
+    python distributed.py worker --broker otherhost:8765 --threads 4
+
+A job is either a schedule's inputs (the games database, players, sessions,
+shared games and table limit), or a prebuilt model as an LP file from
+`streaming.write_lp`. `Coordinator` submits jobs and collects results.
+
+Workers pull a job, and hold a lease on it for as long as they keep sending
+heartbeats. If a worker dies or loses its connection the lease runs out, and
+the job is put back on the queue for another worker - up to `max_attempts`
+times. Results come back with timing stats, and are cached by the broker
+against the job, so an identical job is answered without solving it again.
+"""
+from argparse import ArgumentParser
+import collections
+import hashlib
+import itertools
+import json
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+
+from schedule import GameDatabase, InfeasibleError, Schedule, pulp, result_to_json
+
+
+DEFAULT_PORT = 8765
+
+FINISHED = ('done', 'failed')
+
+OPS = ('submit', 'pull', 'heartbeat', 'complete', 'fail', 'status', 'stats')
+
+
+class Broker:
+    """The job queue, leases and result cache. Thread safe"""
+
+    def __init__(self, lease_timeout=30, max_attempts=3):
+        self.lease_timeout = lease_timeout
+        self.max_attempts = max_attempts
+        self.jobs = {}
+        self.queue = collections.deque()
+        self.cache = {}
+        self.ids = itertools.count(1)
+        self.changed = threading.Condition()
+
+    def submit(self, spec):
+        key = _key(spec)
+
+        with self.changed:
+            job = {
+                'id': str(next(self.ids)),
+                'key': key,
+                'spec': spec,
+                'status': 'queued',
+                'attempts': 0,
+                'worker': None,
+                'lease': None,
+                'submitted': time.time(),
+                'started': None,
+                'finished': None,
+                'result': None,
+                'error': None,
+                'reasons': [],
+                'stats': None,
+                'cached': False,
+            }
+            self.jobs[job['id']] = job
+
+            if key in self.cache:
+                self._finish(job, 'done', result=self.cache[key], cached=True)
+            else:
+                self.queue.append(job['id'])
+                self.changed.notify_all()
+
+        return job['id']
+
+    def pull(self, worker, wait=0):
+        """Returns the next job for a worker to solve, or None if there is
+        none within `wait` seconds
+
+        """
+        deadline = time.time() + wait
+
+        with self.changed:
+            while True:
+                self._reap()
+
+                while self.queue:
+                    job = self.jobs[self.queue.popleft()]
+
+                    if job['status'] == 'queued':
+                        job.update(
+                            status='running',
+                            worker=worker,
+                            attempts=job['attempts'] + 1,
+                            lease=time.time() + self.lease_timeout,
+                            started=time.time(),
+                        )
+                        self.changed.notify_all()
+
+                        return {'id': job['id'], 'spec': job['spec']}
+
+                remaining = deadline - time.time()
+
+                if remaining <= 0:
+                    return None
+
+                self.changed.wait(min(remaining, self.lease_timeout))
+
+    def heartbeat(self, id, worker):
+        """Extend a worker's lease. False if the job is no longer theirs"""
+
+        with self.changed:
+            job = self.jobs.get(id)
+
+            if job is None or job['status'] != 'running' or job['worker'] != worker:
+                return False
+
+            job['lease'] = time.time() + self.lease_timeout
+
+            return True
+
+    def complete(self, id, worker, result, stats):
+        with self.changed:
+            job = self.jobs[id]
+
+            # A late result from a worker whose lease ran out is still good.
+            if job['status'] not in FINISHED:
+                self.cache[job['key']] = result
+                self._finish(job, 'done', result=result, stats=stats, worker=worker)
+
+    def fail(self, id, worker, error, reasons=(), stats=None):
+        """A job that can never succeed, e.g. an infeasible schedule (with the
+        `reasons` it is infeasible)
+
+        """
+        with self.changed:
+            job = self.jobs[id]
+
+            if job['status'] not in FINISHED:
+                self._finish(
+                    job, 'failed', error=error, reasons=list(reasons), stats=stats, worker=worker,
+                )
+
+    def status(self, id, wait=0):
+        """Returns a job, waiting up to `wait` seconds for it to finish"""
+
+        deadline = time.time() + wait
+
+        with self.changed:
+            while True:
+                self._reap()
+                job = self.jobs[id]
+                remaining = deadline - time.time()
+
+                if job['status'] in FINISHED or remaining <= 0:
+                    return {k: v for k, v in job.items() if k != 'spec'}
+
+                self.changed.wait(min(remaining, self.lease_timeout))
+
+    def stats(self):
+        """Returns job counts by status, and per worker the jobs done and
+        mean solve time
+
+        """
+        with self.changed:
+            counts = collections.Counter(job['status'] for job in self.jobs.values())
+            workers = {}
+
+            for job in self.jobs.values():
+                if job['stats']:
+                    w = workers.setdefault(job['worker'], {'jobs': 0, 'solve_seconds': 0.0})
+                    w['jobs'] += 1
+                    w['solve_seconds'] += job['stats']['solve_seconds']
+
+            for w in workers.values():
+                w['mean_solve_seconds'] = w.pop('solve_seconds') / w['jobs']
+
+            return {
+                'jobs': dict(counts),
+                'cached': len([job for job in self.jobs.values() if job['cached']]),
+                'retried': len([job for job in self.jobs.values() if job['attempts'] > 1]),
+                'workers': workers,
+            }
+
+    def _reap(self):
+        """Requeue (or give up on) running jobs whose lease has run out.
+        Must be called holding `self.changed`
+
+        """
+        now = time.time()
+
+        for job in self.jobs.values():
+            if job['status'] == 'running' and job['lease'] < now:
+                if job['attempts'] >= self.max_attempts:
+                    self._finish(job, 'failed', error=f"Lost {job['attempts']} times")
+                else:
+                    job.update(status='queued', worker=None, lease=None)
+                    self.queue.append(job['id'])
+                    self.changed.notify_all()
+
+    def _finish(self, job, status, **attrs):
+        job.update(status=status, finished=time.time(), lease=None, **attrs)
+        self.changed.notify_all()
+
+
+def _key(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """Answers one JSON request per line, until the client hangs up"""
+
+    def handle(self):
+        broker = self.server.broker
+
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+
+                if not isinstance(request, dict):
+                    raise ValueError("Request must be an object")
+
+                op = request.pop('op')
+
+                if op not in OPS:
+                    raise ValueError(f"Unknown op {op!r}")
+
+                reply = {'ok': True, 'reply': getattr(broker, op)(**request)}
+            except KeyError as e:
+                reply = {'ok': False, 'error': f"Missing {e}"}
+            except (TypeError, ValueError) as e:
+                reply = {'ok': False, 'error': str(e)}
+
+            self.wfile.write(json.dumps(reply).encode() + b'\n')
+            self.wfile.flush()
+
+
+class BrokerServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, broker, host='127.0.0.1', port=DEFAULT_PORT):
+        super().__init__((host, port), Handler)
+        self.broker = broker
+
+
+class Connection:
+    """A client connection to a broker"""
+
+    def __init__(self, address):
+        host, port = address.rsplit(':', 1) if isinstance(address, str) else address
+        self.socket = socket.create_connection((host, int(port)))
+        self.file = self.socket.makefile('rwb')
+        self.lock = threading.Lock()
+
+    def call(self, op, **request):
+        with self.lock:
+            self.file.write(json.dumps({'op': op, **request}).encode() + b'\n')
+            self.file.flush()
+            line = self.file.readline()
+
+        if not line:
+            raise ConnectionError("Broker closed the connection")
+
+        reply = json.loads(line)
+
+        if not reply['ok']:
+            raise RuntimeError(reply['error'])
+
+        return reply['reply']
+
+    def close(self):
+        self.file.close()
+        self.socket.close()
+
+
+def schedule_job(games_db, players, sessions, shared_games=[], table_limit=10, time_limit=None):
+    return {
+        'kind': 'schedule',
+        'games': games_db.games,
+        'players': players,
+        'sessions': sessions,
+        'shared_games': shared_games,
+        'table_limit': table_limit,
+        'time_limit': time_limit,
+    }
+
+
+def lp_job(lp, time_limit=None):
+    return {'kind': 'lp', 'lp': lp, 'time_limit': time_limit}
+
+
+class Worker:
+    """Pulls jobs from a broker and solves them, until the broker goes away"""
+
+    def __init__(self, address, name=None, solver='PULP_CBC_CMD', threads=None, heartbeat=5):
+        self.address = address
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+        self.solver = solver
+        self.threads = threads
+        self.heartbeat = heartbeat
+
+    def run(self, max_jobs=None):
+        connection = Connection(self.address)
+
+        try:
+            for _ in itertools.count() if max_jobs is None else range(max_jobs):
+                job = None
+
+                while job is None:
+                    job = connection.call('pull', worker=self.name, wait=self.heartbeat)
+
+                self._run(connection, job)
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            connection.close()
+
+    def _run(self, connection, job):
+        stop = threading.Event()
+        beating = threading.Thread(
+            target=self._beat, args=(connection, job['id'], stop), daemon=True,
+        )
+        beating.start()
+        start = time.time()
+
+        try:
+            result = self.solve(job['spec'])
+        except InfeasibleError as e:
+            outcome = ('fail', {'error': "Problem not solvable", 'reasons': e.reasons})
+        except Exception as e:
+            outcome = ('fail', {'error': str(e)})
+        else:
+            outcome = ('complete', {'result': result})
+        finally:
+            stop.set()
+            beating.join()
+
+        stats = {
+            'worker': self.name,
+            'solver': self.solver,
+            'threads': self.threads,
+            'solve_seconds': time.time() - start,
+        }
+        op, attrs = outcome
+        connection.call(op, id=job['id'], worker=self.name, stats=stats, **attrs)
+
+    def _beat(self, connection, id, stop):
+        while not stop.wait(self.heartbeat):
+            try:
+                connection.call('heartbeat', id=id, worker=self.name)
+            except (ConnectionError, OSError):
+                return
+
+    def solve(self, spec):
+        if spec['kind'] == 'lp':
+            import streaming
+
+            with tempfile.NamedTemporaryFile('w', suffix='.lp') as f:
+                f.write(spec['lp'])
+                f.flush()
+                status, values = streaming.solve_lp_file(
+                    f.name, spec['time_limit'], threads=self.threads,
+                )
+
+            return {'status': status, 'values': values}
+
+        s = Schedule(
+            GameDatabase(spec['games']),
+            spec['players'],
+            spec['sessions'],
+            spec['shared_games'],
+            spec['table_limit'],
+        )
+        options = {'msg': False, 'timeLimit': spec['time_limit']}
+
+        if self.threads:
+            options['threads'] = self.threads
+
+        result = s.solve(pulp.getSolver(self.solver, **options))
+
+        return {'objective': s.p.objective.value(), 'sessions': result_to_json(result)}
+
+
+class Coordinator:
+    """Submits jobs to a broker and collects their results"""
+
+    def __init__(self, address):
+        self.connection = Connection(address)
+        self.models = {}
+
+    def submit(self, spec):
+        return self.connection.call('submit', spec=spec)
+
+    def submit_schedule(
+            self,
+            games_db,
+            players,
+            sessions,
+            shared_games=[],
+            table_limit=10,
+            time_limit=None,
+    ):
+        return self.submit(
+            schedule_job(games_db, players, sessions, shared_games, table_limit, time_limit)
+        )
+
+    def submit_model(self, schedule, time_limit=None):
+        """Submit a Schedule (built with build_model=False) as an LP file"""
+
+        import io
+        import streaming
+
+        f = io.StringIO()
+        index = streaming.write_lp(schedule, f)
+        id = self.submit(lp_job(f.getvalue(), time_limit))
+        self.models[id] = (schedule, index)
+
+        return id
+
+    def status(self, id, wait=0):
+        return self.connection.call('status', id=id, wait=wait)
+
+    def result(self, id, timeout=None):
+        """Wait for a job, returning its result.
+
+        Schedule jobs return {'objective', 'sessions'} with sessions as from
+        `result_to_json`. Model jobs return (result, objective) as from
+        `streaming.solve`.
+
+        """
+        deadline = None if timeout is None else time.time() + timeout
+
+        while True:
+            wait = 5 if deadline is None else max(0, min(5, deadline - time.time()))
+            job = self.status(id, wait=wait)
+
+            if job['status'] in FINISHED:
+                break
+
+            if deadline is not None and time.time() >= deadline:
+                raise TimeoutError(f"Job {id} not finished")
+
+        if job['status'] == 'failed':
+            if job['reasons']:
+                raise InfeasibleError(job['error'], job['reasons'])
+
+            raise RuntimeError(job['error'])
+
+        if id in self.models:
+            import streaming
+
+            schedule, index = self.models[id]
+            values = {int(col): value for col, value in job['result']['values'].items()}
+
+            return streaming.read_result(schedule, index, job['result']['status'], values)
+
+        return job['result']
+
+    def stats(self):
+        return self.connection.call('stats')
+
+    def close(self):
+        self.connection.close()
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Distributed solving: run a broker, or a worker')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparser = subparsers.add_parser('broker', help='Run the job queue')
+    subparser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    subparser.add_argument(
+        '--port', metavar='N', default=DEFAULT_PORT, type=int, help='Port to listen on',
+    )
+    subparser.add_argument(
+        '--lease', metavar='SECONDS', default=30, type=float,
+        help='Requeue jobs without a heartbeat for this long',
+    )
+    subparser.add_argument(
+        '--max-attempts', metavar='N', default=3, type=int, help='Times to try a job',
+    )
+
+    subparser = subparsers.add_parser('worker', help='Solve jobs from a broker')
+    subparser.add_argument('--broker', default=f'127.0.0.1:{DEFAULT_PORT}', help='Broker host:port')
+    subparser.add_argument('--name', help='Worker name (default host:pid)')
+    subparser.add_argument('--solver', default='PULP_CBC_CMD', help='PuLP solver to use')
+    subparser.add_argument('--threads', metavar='N', type=int, help='Solver threads')
+    subparser.add_argument(
+        '--heartbeat', metavar='SECONDS', default=5, type=float, help='Heartbeat interval',
+    )
+    args = parser.parse_args()
+
+    if args.command == 'broker':
+        server = BrokerServer(Broker(args.lease, args.max_attempts), args.host, args.port)
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    else:
+        Worker(args.broker, args.name, args.solver, args.threads, args.heartbeat).run()
@@ -0,0 +1,132 @@
+"""Compact types for the scheduling domain.
+
+Players, sessions and results come in (and go out) as plain JSON-style dicts
+and lists. Internally `Schedule` works with these `__slots__` classes instead,
+which are smaller, have fast attribute access, refer to each other by integer
+ID, and keep interests etc. as sets for constant time membership tests.
+
+Each has `from_json` / `to_json` adapters to convert from and to the file
+formats described in the README.
+"""
+
+
+class Player:
+    __slots__ = ('id', 'name', 'owns', 'interests', 'sessions')
+
+    def __init__(self, id, name, owns=(), interests=(), sessions=()):
+        self.id = id
+        self.name = name
+        self.owns = frozenset(owns)
+        self.interests = frozenset(interests)
+        self.sessions = frozenset(sessions)
+
+    def __repr__(self):
+        return f"Player({self.id!r}, {self.name!r})"
+
+    @classmethod
+    def from_json(cls, id, player, default_sessions=()):
+        """Build from a players.json entry. Without `sessions`, they attend all"""
+
+        return cls(
+            id,
+            player['name'],
+            player['owns'],
+            player['interests'],
+            player.get('sessions', default_sessions),
+        )
+
+    def to_json(self):
+        return {
+            'name': self.name,
+            'owns': sorted(self.owns),
+            'interests': sorted(self.interests),
+            'sessions': sorted(self.sessions),
+        }
+
+    def weight(self, game):
+        """Returns how interested the player is in a game - see Schedule.weight"""
+
+        if game in self.interests:
+            if game in self.owns:
+                return 1.05
+            else:
+                return 1.0
+        else:
+            return 0.0
+
+
+class Session:
+    __slots__ = ('id', 'name', 'length')
+
+    def __init__(self, id, name, length):
+        self.id = id
+        self.name = name
+        self.length = length
+
+    def __repr__(self):
+        return f"Session({self.id!r}, {self.name!r}, {self.length!r})"
+
+    @classmethod
+    def from_json(cls, id, session):
+        return cls(id, session.get('name', str(id)), session['length'])
+
+    def to_json(self):
+        return {'name': self.name, 'length': self.length}
+
+
+class GameCopy:
+    """A copy of a game: either shared (owner is None) or brought by a player"""
+
+    __slots__ = ('id', 'game', 'owner')
+
+    def __init__(self, id, game, owner=None):
+        self.id = id
+        self.game = game
+        self.owner = owner
+
+    def __repr__(self):
+        return f"GameCopy({self.id!r}, {self.game!r}, owner={self.owner!r})"
+
+
+class Table:
+    """A copy of a game being played in a session, by players (a tuple of IDs)"""
+
+    __slots__ = ('session', 'copy', 'players')
+
+    def __init__(self, session, copy, players):
+        self.session = session
+        self.copy = copy
+        self.players = tuple(players)
+
+    def __repr__(self):
+        return f"Table({self.session!r}, {self.copy!r}, {self.players!r})"
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Table) and
+            (self.session, self.copy, self.players) ==
+            (other.session, other.copy, other.players)
+        )
+
+    def to_json(self, copies, roster):
+        return {
+            'session': self.session,
+            'game': copies[self.copy].game,
+            'players': [roster[p].name for p in self.players],
+        }
+
+
+def make_copies(shared_games, players):
+    """Returns the GameCopy for each shared game, then each game players own.
+
+    Owned games are in the order given in each player's `owns`, so the IDs
+    match `Schedule.all_games`.
+
+    """
+    copies = [GameCopy(i, game) for i, game in enumerate(shared_games)]
+
+    for j, player in enumerate(players):
+        for game in player['owns']:
+            copies.append(GameCopy(len(copies), game, j))
+
+    return copies
@@ -0,0 +1,309 @@
+"""Score a schedule, and check edits to it, without the solver.
+
+After the solver has run, organisers often hand-edit the schedule - moving
+players between tables or swapping them. `Evaluator` takes a schedule (in the
+format returned by `Schedule.solve`, or with player names in place of player
+dicts), computes the objective exactly as `Schedule` defines it and lists any
+broken rules. It then keeps these up to date as players are moved, in
+constant time per move, so the effect of an edit can be checked immediately.
+
+Tables below their minimum player count contribute no popularity (and are
+reported as violations); the solver would never produce them. Edits that
+cannot be made, and schedules naming unknown players, raise ValueError.
+"""
+from argparse import ArgumentParser
+import json
+import sys
+
+from domain import Player
+from schedule import GameDatabase
+
+
+class Evaluator:
+    def __init__(self, games_db, players, sessions, result, shared_games=[], table_limit=10):
+        self.games_db = games_db
+        self.sessions = sessions
+        self.table_limit = table_limit
+        self.players = {
+            p['name']: Player.from_json(i, p, range(len(sessions)))
+            for i, p in enumerate(players)
+        }
+
+        self.score = 0.0
+        self.violations = {}
+
+        # For each session, a list of [game, set of player names].
+        self.tables = [[] for _ in sessions]
+        self.seats = {}
+        self.plays = {}
+        self.in_use = {}
+        self.open_tables = [0] * len(sessions)
+        self.copies = {}
+
+        for game in shared_games:
+            for s, _ in enumerate(sessions):
+                self.copies[s, game] = self.copies.get((s, game), 0) + 1
+
+        for p in players:
+            for game in p['owns']:
+                for s in self.players[p['name']].sessions:
+                    self.copies[s, game] = self.copies.get((s, game), 0) + 1
+
+        keys = set()
+
+        for s, tables in enumerate(result):
+            for game, table_players in tables:
+                t = self.open_table(s, game)
+
+                for p in table_players:
+                    if _name(p) not in self.players:
+                        raise ValueError(f"Session {s} table {t}: unknown player {_name(p)!r}")
+
+                    keys |= self._sit(_name(p), s, t)
+
+        for name, player in self.players.items():
+            for s in player.sessions:
+                keys.add(('seat', s, name))
+
+        self._refresh(keys)
+
+    def open_table(self, session, game):
+        """Adds an empty table for game, returning its index"""
+
+        self.tables[session].append([game, set()])
+
+        return len(self.tables[session]) - 1
+
+    def move(self, name, session, src, dst):
+        """Move a player between tables in a session.
+
+        Raises ValueError, leaving the schedule unchanged, if the player is
+        not at `src` or either table does not exist.
+
+        """
+        self._check_move(name, session, src, dst)
+
+        return self._move(name, session, src, dst)
+
+    def swap(self, session, a, table_a, b, table_b):
+        """Swap two players' tables in a session. Raises ValueError, leaving
+        the schedule unchanged, if either move is not possible
+
+        """
+        self._check_move(a, session, table_a, table_b)
+        self._check_move(b, session, table_b, table_a)
+
+        return (
+            self._move(a, session, table_a, table_b) |
+            self._move(b, session, table_b, table_a)
+        )
+
+    def try_move(self, name, session, src, dst):
+        """Returns (score change, new violations) if the move were made"""
+
+        return self._try(
+            lambda: self.move(name, session, src, dst),
+            lambda: self.move(name, session, dst, src),
+        )
+
+    def try_swap(self, session, a, table_a, b, table_b):
+        """Returns (score change, new violations) if the swap were made"""
+
+        return self._try(
+            lambda: self.swap(session, a, table_a, b, table_b),
+            lambda: self.swap(session, a, table_b, b, table_a),
+        )
+
+    def _try(self, do, undo):
+        score = self.score
+        keys = do()
+
+        try:
+            delta = self.score - score
+            after = {k: self.violations[k] for k in keys if k in self.violations}
+        finally:
+            undo()
+
+        # Undoing puts back the violations of only the keys touched, as they
+        # were before, so only those need comparing.
+        return delta, [message for k, message in after.items() if k not in self.violations]
+
+    def _check_move(self, name, session, src, dst):
+        if not 0 <= session < len(self.tables):
+            raise ValueError(f"No session {session}")
+
+        for t in (src, dst):
+            if not 0 <= t < len(self.tables[session]):
+                raise ValueError(f"No table {t} in session {session}")
+
+        if name not in self.tables[session][src][1]:
+            raise ValueError(f"{name} is not at table {src} in session {session}")
+
+    def _move(self, name, session, src, dst):
+        keys = self._stand(name, session, src) | self._sit(name, session, dst)
+        self._refresh(keys)
+
+        return keys
+
+    def _sit(self, name, session, t):
+        game, seated = self.tables[session][t]
+
+        if name in seated:
+            return set()
+
+        player = self.players[name]
+        self.score -= self.games_db.popularity(game, len(seated))
+
+        if not seated:
+            self.open_tables[session] += 1
+            self.in_use[session, game] = self.in_use.get((session, game), 0) + 1
+
+        seated.add(name)
+        self.score += self.games_db.popularity(game, len(seated))
+        self.score += player.weight(game)
+        self.seats[session, name] = self.seats.get((session, name), 0) + 1
+        self.plays[name, game] = self.plays.get((name, game), 0) + 1
+
+        return self._keys(name, session, t, game)
+
+    def _stand(self, name, session, t):
+        game, seated = self.tables[session][t]
+        player = self.players[name]
+
+        self.score -= self.games_db.popularity(game, len(seated))
+        seated.discard(name)
+        self.score += self.games_db.popularity(game, len(seated))
+
+        if not seated:
+            self.open_tables[session] -= 1
+            self.in_use[session, game] -= 1
+
+        self.score -= player.weight(game)
+        self.seats[session, name] -= 1
+        self.plays[name, game] -= 1
+
+        return self._keys(name, session, t, game)
+
+    def _keys(self, name, session, t, game):
+        return {
+            ('table', session, t),
+            ('limit', session),
+            ('copies', session, game),
+            ('seat', session, name),
+            ('repeat', name, game),
+        }
+
+    def _refresh(self, keys):
+        for key in keys:
+            message = getattr(self, f'_check_{key[0]}')(*key[1:])
+
+            if message:
+                self.violations[key] = message
+            else:
+                self.violations.pop(key, None)
+
+    def _check_table(self, s, t):
+        game, seated = self.tables[s][t]
+        lo = self.games_db.min_players(game)
+        hi = self.games_db.max_players(game, self.sessions[s])
+
+        if not seated:
+            return
+
+        if self.games_db.min_playtime(game) > self.sessions[s]['length']:
+            return f"Session {s} table {t}: {game} does not fit in the session"
+
+        if not lo <= len(seated) <= hi:
+            return f"Session {s} table {t}: {game} has {len(seated)} players, needs {lo}-{hi}"
+
+    def _check_limit(self, s):
+        if self.open_tables[s] > self.table_limit:
+            return f"Session {s}: {self.open_tables[s]} tables, limit is {self.table_limit}"
+
+    def _check_copies(self, s, game):
+        available = self.copies.get((s, game), 0)
+
+        if self.in_use.get((s, game), 0) > available:
+            return f"Session {s}: {self.in_use[s, game]} tables of {game}, {available} copies"
+
+    def _check_seat(self, s, name):
+        seats = self.seats.get((s, name), 0)
+
+        if s not in self.players[name].sessions:
+            if seats:
+                return f"Session {s}: {name} is not attending"
+        elif seats != 1:
+            return f"Session {s}: {name} is at {seats} tables"
+
+    def _check_repeat(self, name, game):
+        if self.plays.get((name, game), 0) > 1:
+            return f"{name} plays {game} {self.plays[name, game]} times"
+
+
+def _name(player):
+    return player if isinstance(player, str) else player['name']
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Score a schedule and check it against the rules')
+    parser.add_argument('--games', metavar='FILE', default='games.json', help='Games database json')
+    parser.add_argument(
+        '--players', metavar='FILE', default='sample/players.json',
+        help='Player interests json file',
+    )
+    parser.add_argument(
+        '--sessions', metavar='FILE', default='sample/sessions.json', help='Session info json file',
+    )
+    parser.add_argument(
+        '--table-limit', metavar='N', default=10, type=int, help='Tables per session',
+    )
+    parser.add_argument(
+        '--shared-games', nargs='*', metavar='GAMES', default=[], help='Shared games',
+    )
+    parser.add_argument(
+        '--move', nargs=4, action='append', default=[], metavar=('PLAYER', 'SESSION', 'FROM', 'TO'),
+        help='Show the effect of moving a player between tables (numbered from 0)',
+    )
+    parser.add_argument(
+        'schedule', metavar='FILE',
+        help='Schedule json: per session, a list of {"game": ..., "players": [names]}',
+    )
+    args = parser.parse_args()
+
+    with open(args.players) as f:
+        players = json.load(f)
+
+    with open(args.sessions) as f:
+        sessions = json.load(f)
+
+    with open(args.schedule) as f:
+        result = [[(t['game'], t['players']) for t in tables] for tables in json.load(f)]
+
+    try:
+        e = Evaluator(
+            GameDatabase.from_file(args.games),
+            players,
+            sessions,
+            result,
+            shared_games=args.shared_games,
+            table_limit=args.table_limit,
+        )
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+
+    print(f"Objective function: {e.score}")
+
+    for message in e.violations.values():
+        print(f"Violation: {message}")
+
+    for name, session, src, dst in args.move:
+        try:
+            delta, violations = e.try_move(name, int(session), int(src), int(dst))
+        except ValueError as error:
+            print(f"Cannot move {name}: {error}")
+            continue
+
+        print(f"Moving {name} from table {src} to {dst} in session {session}: {delta:+}")
+
+        for message in violations:
+            print(f"  New violation: {message}")
@@ -3,9 +3,6 @@ import json
 import re
 from xml.etree import ElementTree
 
-from boardgamegeek import BGGClient
-import requests
-
 
 FAMILY_URL = 'https://api.geekdo.com/xmlapi2/family?id=19&type=boardgamefamily'
 
@@ -43,6 +40,8 @@ def retrieve_18xx_family_xml(args):
         with open(args.xml, 'r') as f:
             return f.read()
 
+    import requests
+
     result = requests.get(FAMILY_URL)
     result.raise_for_status()
 
@@ -174,6 +173,8 @@ if __name__ == '__main__':
     )
     args = parser.parse_args()
 
+    from boardgamegeek import BGGClient
+
     raw = retrieve_18xx_family_xml(args)
     possible_game_ids = list(set(entries_from_raw_family_xml(raw)) - REMOVE_IDS)
     possible_games = BGGClient().game_list(possible_game_ids)
@@ -4,9 +4,10 @@
 # Assumes a file called 'games.json' exists in the same directory, as would be
 # generated by game_data.py
 
+from argparse import ArgumentParser
+from functools import lru_cache
 import json
 
-from faker import Faker
 import numpy as np
 
 
@@ -25,12 +26,18 @@ LOCALES = [
     'pl_PL',
 ]
 
-FAKES = [Faker(l) for l in LOCALES]
+
+@lru_cache(maxsize=None)
+def fakes():
+    """Return a faker for each locale, built the first time they are needed"""
+    from faker import Faker
+
+    return [Faker(l) for l in LOCALES]
 
 
 def fake():
     """Return a faker from a random locale"""
-    return FAKES[np.random.choice(len(LOCALES))]
+    return fakes()[np.random.choice(len(LOCALES))]
 
 
 def names(n=40):
@@ -81,10 +88,7 @@ def sessions(n_max):
     contiguous subset of sessions.
 
     """
-    p = [0.3 / (n_max-1)] * (n_max - 1)
-    p.append(0.7)
-
-    n = np.random.choice(n_max, p=p) + 1
+    n = np.random.choice(n_max, p=session_count_distribution(n_max)) + 1
 
     if n < n_max:
         a = np.random.choice(n_max - n + 1)
@@ -94,6 +98,17 @@ def sessions(n_max):
     return list(range(n_max))[a:(a+n)]
 
 
+def session_count_distribution(n_max):
+    """Return the probability of attending 1..n_max sessions"""
+    if n_max == 1:
+        return [1.0]
+
+    p = [0.3 / (n_max-1)] * (n_max - 1)
+    p.append(0.7)
+
+    return p
+
+
 def make_games_distribution(games_db):
     """Return the probability distribution of owning / wanting to play a game
 
@@ -104,24 +119,162 @@ def make_games_distribution(games_db):
     return [g['owned'] / total_owned for g in games_db]
 
 
+# Bulk generation for stress testing: rather than drawing each person's
+# choices one at a time, draw them for a whole chunk of people at once.
+
+# Owned games per person, as in owned_games.
+OWNED_DISTRIBUTION = [0.5, 0.2, 0.1, 0.1, 0.05, 0.05]
+
+# Extra games a person wants to play, as in want_to_play.
+MAX_WANTED = 8
+
+
+def name_pool(size=200):
+    """Return lists of first and last names to combine into unique names"""
+    first = set()
+    last = set()
+
+    # Faker runs out of distinct names before long, so give up eventually.
+    for _ in range(size * 10):
+        if len(first) >= size and len(last) >= size:
+            break
+
+        f = fake()
+        first.add(f.first_name())
+        last.add(f.last_name())
+
+    return sorted(first), sorted(last)
+
+
+def bulk_names(start, n, first, last):
+    """Return n unique names, for people numbered from start.
+
+    Person i gets a different first/last combination until these run out, and
+    then a number after their name as well.
+
+    """
+    i = np.arange(start, start + n)
+    combinations = len(first) * len(last)
+    firsts = np.asarray(first, dtype=object)[i % len(first)]
+    lasts = np.asarray(last, dtype=object)[(i // len(first)) % len(last)]
+    repeats = i // combinations
+
+    return [
+        f'{a} {b}' if r == 0 else f'{a} {b} {r + 1}'
+        for a, b, r in zip(firsts, lasts, repeats.tolist())
+    ]
+
+
+def bulk_jsonl(n, games_db, games_distribution, n_sessions, rng, chunk_size=10000, pool=None):
+    """Yield n people as JSON lines, in strings of up to chunk_size people.
+
+    Draws the same distributions as owned_games, want_to_play and sessions,
+    but for a whole chunk at once. Weighted draws without replacement use
+    exponential keys: dividing Exp(1) noise by each game's probability and
+    taking the smallest k gives a weighted sample of k, so one partition
+    orders the games for every person in the chunk. The games a person owns
+    are the first of these, and the games they want to play are those plus
+    the next few.
+
+    Only a chunk is held in memory at once.
+
+    """
+    # Everything that varies per person is JSON encoded once up front.
+    games = [json.dumps(g['name']) for g in games_db]
+    inverse_p = (1 / np.asarray(games_distribution)).astype(np.float32)
+    most = min(len(games), len(OWNED_DISTRIBUTION) - 1 + MAX_WANTED - 1)
+    first, last = pool or name_pool()
+    first = [json.dumps(x)[1:-1] for x in first]
+    last = [json.dumps(x)[1:-1] for x in last]
+    attend_p = session_count_distribution(n_sessions)
+    attends = {
+        (s, a): json.dumps(list(range(s, s + a)))
+        for a in range(1, n_sessions + 1)
+        for s in range(n_sessions - a + 1)
+    }
+
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+
+        owned = np.minimum(
+            rng.choice(len(OWNED_DISTRIBUTION), size=size, p=OWNED_DISTRIBUTION), most,
+        )
+        wanted = np.minimum(owned + rng.integers(0, MAX_WANTED, size=size), most)
+
+        keys = rng.standard_exponential(size=(size, len(games)), dtype=np.float32) * inverse_p
+        top = np.argpartition(keys, most - 1, axis=1)[:, :most]
+        ranks = np.argsort(np.take_along_axis(keys, top, axis=1), axis=1)
+        order = np.take_along_axis(top, ranks, axis=1)
+
+        attending = rng.choice(n_sessions, size=size, p=attend_p) + 1
+        first_session = (rng.random(size) * (n_sessions - attending + 1)).astype(int)
+
+        yield ''.join(
+            f'{{"name": "{name}", '
+            f'"owns": [{", ".join([games[g] for g in row[:o]])}], '
+            f'"interests": [{", ".join([games[g] for g in row[:w]])}], '
+            f'"sessions": {attends[s, a]}}}\n'
+            for name, row, o, w, a, s in zip(
+                bulk_names(start, size, first, last),
+                order.tolist(),
+                owned.tolist(),
+                wanted.tolist(),
+                attending.tolist(),
+                first_session.tolist(),
+            )
+        )
+
+
 if __name__ == '__main__':
-    with open('games.json', 'r') as f:
+    parser = ArgumentParser(description='Generate a sample players file')
+    parser.add_argument('--games', metavar='FILE', default='games.json', help='Games database json')
+    parser.add_argument('--players', metavar='N', default=40, type=int, help='Number of players')
+    parser.add_argument('--sessions', metavar='N', default=4, type=int, help='Number of sessions')
+    parser.add_argument('--seed', metavar='N', type=int, help='Random seed')
+    parser.add_argument(
+        '--bulk', action='store_true',
+        help='Generate players in vectorised chunks, writing JSON lines - for large stress tests',
+    )
+    parser.add_argument(
+        '--chunk-size', metavar='N', default=10000, type=int, help='Players per chunk with --bulk',
+    )
+    parser.add_argument(
+        'output', metavar='FILE', nargs='?',
+        help='Output file (sample.json, or sample.jsonl with --bulk)',
+    )
+    args = parser.parse_args()
+
+    with open(args.games, 'r') as f:
         games_db = json.load(f)
 
     games_db = sorted(games_db, key=lambda g: g['owned'], reverse=True)
     games_distribution = make_games_distribution(games_db)
-    people = names()
-    result = []
 
-    for person in people:
-        games_owned = owned_games(games_db, games_distribution)
+    if args.seed is not None:
+        np.random.seed(args.seed)
+
+    if args.bulk:
+        rng = np.random.default_rng(args.seed)
+        chunks = bulk_jsonl(
+            args.players, games_db, games_distribution, args.sessions, rng,
+            chunk_size=args.chunk_size,
+        )
+
+        with open(args.output or 'sample.jsonl', 'w') as f:
+            f.writelines(chunks)
+    else:
+        people = names(args.players)
+        result = []
+
+        for person in people:
+            games_owned = owned_games(games_db, games_distribution)
 
-        result.append({
-            'name': person,
-            'owns': games_owned,
-            'interests': want_to_play(games_db, games_owned, games_distribution),
-            'sessions': sessions(4),
-        })
+            result.append({
+                'name': person,
+                'owns': games_owned,
+                'interests': want_to_play(games_db, games_owned, games_distribution),
+                'sessions': sessions(args.sessions),
+            })
 
-    with open('sample.json', 'w') as f:
-        json.dump(result, f, indent=2)
+        with open(args.output or 'sample.json', 'w') as f:
+            json.dump(result, f, indent=2)
@@ -0,0 +1,278 @@
+"""Packing several back-to-back games into long sessions.
+
+A `Schedule` assumes a game takes up a whole session. For long sessions (a
+720 minute Saturday, say) that wastes most of the day for shorter games. Here
+we split each session into time buckets of `granularity` minutes and offer
+"slots" - runs of consecutive buckets long enough for some game - as if they
+were sessions of their own. Slots overlap, so instead of "one game per
+session" each player must be at exactly one table in every bucket, and tables
+and game copies are limited per bucket.
+
+Slots are only generated for durations that some game actually needs, and only
+where a sequence of such durations could tile the rest of the session, which
+keeps the model small. Coarser granularity means fewer slots and a smaller
+model, at the cost of rounding game lengths up to whole buckets.
+"""
+from argparse import ArgumentParser
+import json
+import time
+
+import pulp
+
+from domain import Player
+from schedule import GameDatabase, Schedule
+
+
+def make_slots(sessions, games_db, titles, granularity):
+    """Return the candidate slots for each session.
+
+    Each slot is a session-like dict with the `length` of the slot and extra
+    keys: `session` (the index of the session it is in), `start` (minutes from
+    the start of that session) and `buckets` (the time buckets it covers).
+
+    """
+    slots = []
+
+    for s, session in enumerate(sessions):
+        length = session['length']
+        boundaries = list(range(0, length, granularity)) + [length]
+        n = len(boundaries) - 1
+
+        # The number of buckets needed for each useful game length, and always
+        # the whole session.
+        durations = {n}
+
+        for title in titles:
+            for playtime in (games_db.min_playtime(title), games_db.max_playtime(title)):
+                d = next((d for d, b in enumerate(boundaries) if b >= playtime), None)
+
+                if d:
+                    durations.add(d)
+
+        durations = sorted(durations)
+        reachable = _reachable(durations, n)
+
+        for d in durations:
+            for b in range(n - d + 1):
+                # A player has a game in every bucket, so a slot is only
+                # usable if games can fill the time either side of it.
+                if reachable[b] and reachable[n - b - d]:
+                    start, end = boundaries[b], boundaries[b + d]
+                    slots.append({
+                        'name': f"{session.get('name', s)} {start}-{end}",
+                        'length': end - start,
+                        'session': s,
+                        'start': start,
+                        'buckets': range(b, b + d),
+                    })
+
+    return slots
+
+
+def _reachable(durations, n):
+    """Which numbers of buckets, up to n, can be exactly filled by durations"""
+
+    reachable = [True] + [False] * n
+
+    for i in range(1, n + 1):
+        reachable[i] = any(d <= i and reachable[i - d] for d in durations)
+
+    return reachable
+
+
+class PackedSchedule(Schedule):
+    """A Schedule that packs back-to-back games into sessions.
+
+    `solve()` returns [[(start, game, [player, ...]), ...], ...] - for each
+    session, the games played with their start time in minutes from the start
+    of the session.
+
+    """
+    def __init__(
+            self,
+            games_db,
+            players,
+            sessions,
+            shared_games=[],
+            table_limit=10,
+            granularity=60,
+            **kwargs,
+    ):
+        self.event_sessions = sessions
+        self.granularity = granularity
+
+        titles = set(shared_games)
+        for player in players:
+            titles.update(player['owns'])
+
+        slots = make_slots(sessions, games_db, titles, granularity)
+
+        super().__init__(games_db, players, slots, shared_games, table_limit, **kwargs)
+
+    def check_feasibility(self):
+        """Only sessions where no game fits at all are obviously infeasible"""
+
+        reasons = []
+
+        for s, session in enumerate(self.event_sessions):
+            slots = [i for i in self.session_ids if self.sessions[i]['session'] == s]
+
+            if any(self.session_players[i] for i in slots) and not any(
+                    self.session_games[i] for i in slots
+            ):
+                reasons.append(
+                    f"Session {session.get('name', s)}: no game fits in "
+                    f"{session['length']} minutes"
+                )
+
+        return reasons
+
+    def _copy(self, **kwargs):
+        return PackedSchedule(
+            self.games_db,
+            self.players,
+            self.event_sessions,
+            self.shared_games,
+            self.table_limit,
+            granularity=self.granularity,
+            **kwargs,
+        )
+
+    def _result(self):
+        result = [[] for _ in self.event_sessions]
+
+        for slot, tables in zip(self.sessions, super()._result()):
+            for game, players in tables:
+                result[slot['session']].append((slot['start'], game, players))
+
+        return [sorted(r, key=lambda x: (x[0], x[1])) for r in result]
+
+    def _interests_served(self, p, player):
+        """Per event session, not per slot: a player who plays one long game
+        they are interested in is as well served as one who plays several
+        short ones
+
+        """
+        served = []
+
+        for s in player.sessions:
+            interesting = [
+                self.choices[i][p][k]
+                for i in self.session_ids
+                if self.sessions[i]['session'] == s and p in self.choices[i]
+                for k in self.session_games[i]
+                if self.all_games[k] in player.interests
+            ]
+            var = pulp.LpVariable(f'Served_{p}_{s}', lowBound=0, upBound=1)
+            self.p += (var <= pulp.lpSum(interesting), f"Served player {p} session {s}")
+            served.append(var)
+
+        return served
+
+    def _make_roster(self):
+        """Players' sessions are event sessions, not slots"""
+
+        return [
+            Player.from_json(i, player, range(len(self.event_sessions)))
+            for i, player in enumerate(self.players)
+        ]
+
+    def _make_session_players(self):
+        """Players are available in every slot of the sessions they attend"""
+
+        return [
+            [player.id for player in self.roster if slot['session'] in player.sessions]
+            for slot in self.sessions
+        ]
+
+    def _add_logical_play_constraints(self):
+        """Enforce logical constraints, per time bucket rather than per slot.
+
+        * Players are at exactly one table in every bucket of their sessions.
+        * A game must be played with n players to be played with n+1.
+        * Do not break the table limit in any bucket.
+        * A copy of a game can only be on one table at a time.
+        """
+        covering = {}
+
+        for i, slot in enumerate(self.sessions):
+            self._add_increasing_count_constraints(i)
+
+            for b in slot['buckets']:
+                covering.setdefault((slot['session'], b), []).append(i)
+
+        for (s, b), slots in covering.items():
+            name = f"{self.event_sessions[s].get('name', s)} bucket {b}"
+
+            for j in self.session_players[slots[0]]:
+                unseated = self._slack(
+                    f"Session {name}: player {self.roster[j].name} cannot be seated",
+                )
+                self.p += (
+                    pulp.lpSum(
+                        var for i in slots for var in self.choices[i][j].values()
+                    ) + unseated == 1,
+                    f"Game Per Bucket session {s} bucket {b} player {j}",
+                )
+
+            copies = {}
+            for i in slots:
+                for g, counts in self.games_played[i].items():
+                    copies.setdefault(g, []).append(counts[0])
+
+            extra_tables = self._slack(
+                f"Session {name}: needs more than {self.table_limit} tables",
+            )
+            self.p += (
+                pulp.lpSum(v for tables in copies.values() for v in tables)
+                <= self.table_limit + extra_tables,
+                f"Table limit session {s} bucket {b}",
+            )
+
+            for g, tables in copies.items():
+                if len(tables) > 1:
+                    self.p += (
+                        pulp.lpSum(tables) <= 1,
+                        f"One table per copy session {s} bucket {b} game {g}",
+                    )
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Show how the packed model grows with granularity')
+    parser.add_argument('--games', metavar='FILE', default='games.json', help='Games database json')
+    parser.add_argument(
+        '--players', metavar='FILE', default='sample/players.json',
+        help='Player interests json file',
+    )
+    parser.add_argument(
+        '--sessions', metavar='FILE', default='sample/sessions.json', help='Session info json file',
+    )
+    parser.add_argument('--solve', action='store_true', help='Also time solving each model')
+    parser.add_argument('granularity', nargs='*', type=int, default=[240, 120, 60, 30])
+    args = parser.parse_args()
+
+    with open(args.sessions) as f:
+        sessions = json.load(f)
+
+    games = GameDatabase.from_file(args.games)
+
+    print("granularity\tslots\tvariables\tconstraints\tbuild_s\tsolve_s")
+
+    for granularity in args.granularity:
+        with open(args.players) as f:
+            players = json.load(f)
+
+        start = time.perf_counter()
+        s = PackedSchedule(games, players, sessions, granularity=granularity)
+        built = time.perf_counter() - start
+        solved = ''
+
+        if args.solve:
+            start = time.perf_counter()
+            s.solve(pulp.PULP_CBC_CMD(msg=False))
+            solved = f"{time.perf_counter() - start:.2f}"
+
+        print(
+            f"{granularity}\t{len(s.sessions)}\t{s.p.numVariables()}\t"
+            f"{s.p.numConstraints()}\t{built:.2f}\t{solved}"
+        )
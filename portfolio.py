@@ -0,0 +1,253 @@
+"""Race several solver configurations against each other.
+
+CBC's runtime on the scheduling problem varies wildly with its random seed and
+with small changes to the formulation. Rather than betting on one
+configuration, we start several in separate processes and take the first one
+that proves optimality.
+"""
+import multiprocessing
+import os
+import queue
+import signal
+import time
+
+import pulp
+
+from schedule import Schedule
+
+
+# Required improvement over the best known objective for a later
+# configuration's solution to count as better.
+CUTOFF_EPSILON = 1e-6
+
+CBC_SOLVERS = {'PULP_CBC_CMD', 'COIN_CMD'}
+
+# How often to check for configurations that died without reporting back.
+POLL_INTERVAL = 0.5
+
+
+class SolverConfig:
+    """One entry in a solver portfolio.
+
+    * `solver` is a PuLP solver name, as accepted by `pulp.getSolver`.
+    * `seed` is passed to CBC as its random seeds (ignored by other solvers).
+    * `cuts` / `presolve` turn the solver's cut generation and presolve on or
+      off - None leaves the solver's default alone.
+    * `symmetry_breaking` selects the formulation - see
+      `Schedule._add_symmetry_breaking_constraints`.
+    """
+
+    def __init__(
+            self,
+            solver='PULP_CBC_CMD',
+            seed=None,
+            cuts=None,
+            presolve=None,
+            symmetry_breaking=False,
+            threads=None,
+    ):
+        self.solver = solver
+        self.seed = seed
+        self.cuts = cuts
+        self.presolve = presolve
+        self.symmetry_breaking = symmetry_breaking
+        self.threads = threads
+
+    def __repr__(self):
+        return (
+            f"SolverConfig({self.solver!r}, seed={self.seed!r}, cuts={self.cuts!r}, "
+            f"presolve={self.presolve!r}, symmetry_breaking={self.symmetry_breaking!r})"
+        )
+
+    def build(self, time_limit=None):
+        """Returns the PuLP solver object for this configuration"""
+
+        kwargs = {'msg': False, 'timeLimit': time_limit}
+
+        if self.threads is not None:
+            kwargs['threads'] = self.threads
+
+        if self.solver in CBC_SOLVERS:
+            kwargs['cuts'] = self.cuts
+            kwargs['presolve'] = self.presolve
+
+            if self.seed is not None:
+                kwargs['options'] = [f'randomSeed {self.seed}', f'randomCbcSeed {self.seed}']
+
+        return pulp.getSolver(self.solver, **kwargs)
+
+
+DEFAULT_PORTFOLIO = [
+    SolverConfig(),
+    SolverConfig(seed=7, symmetry_breaking=True),
+    SolverConfig(seed=42, cuts=False),
+    SolverConfig(seed=1234, presolve=False, symmetry_breaking=True),
+]
+
+
+def solve_portfolio(schedule, configs=DEFAULT_PORTFOLIO, time_limit=None, processes=None):
+    """Solve `schedule` by racing each of `configs` in its own process.
+
+    At most `processes` configurations run at once (default: one per core,
+    up to the number of configurations). If there are more configurations
+    than that, the rest are started as earlier ones finish, with the best
+    objective found so far added as a cutoff constraint so they only search
+    for improvements. A configuration whose process dies without reporting
+    (e.g. killed for running out of memory) counts as finding nothing.
+
+    Returns as soon as a configuration proves optimality, every configuration
+    has finished, or `time_limit` seconds have passed - killing any solvers
+    still running. The winning variable values and status are copied onto
+    `schedule.p`, so `schedule.solve()` can read the result as normal. If
+    nothing found a solution, the problem status is set to infeasible or not
+    solved as appropriate.
+
+    Returns the winning SolverConfig, or None.
+
+    """
+    processes = processes or max(1, min(os.cpu_count() or 1, len(configs)))
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    args = (
+        schedule.games_db,
+        schedule.players,
+        schedule.sessions,
+        schedule.shared_games,
+        schedule.table_limit,
+    )
+
+    results = multiprocessing.Queue()
+    pending = list(enumerate(configs))
+    running = {}
+    best = None
+    best_objective = None
+    proven = False
+    infeasible = False
+
+    try:
+        while (pending or running) and not (proven or infeasible):
+            remaining = None if deadline is None else deadline - time.monotonic()
+
+            if remaining is not None and remaining <= 0:
+                break
+
+            while pending and len(running) < processes:
+                index, config = pending.pop(0)
+                process = multiprocessing.Process(
+                    target=_solve_config,
+                    args=(index, args, config, remaining, best_objective, results),
+                    daemon=True,
+                )
+                process.start()
+                running[index] = (process, best_objective)
+
+            try:
+                index, status, sol_status, objective, values = _next_result(
+                    results, running, remaining,
+                )
+            except queue.Empty:
+                break
+
+            process, cutoff = running.pop(index)
+            process.join()
+
+            if status == pulp.LpStatusInfeasible:
+                if cutoff is None:
+                    infeasible = True
+                else:
+                    # Nothing beats the incumbent, so it is optimal.
+                    proven = True
+            elif sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible):
+                if best_objective is None or objective > best_objective:
+                    best = (index, values)
+                    best_objective = objective
+
+                proven = sol_status == pulp.LpSolutionOptimal
+    finally:
+        for process, _ in running.values():
+            kill_process_group(process)
+
+    if best is None:
+        schedule.p.assignStatus(pulp.LpStatusInfeasible if infeasible else pulp.LpStatusNotSolved)
+        return None
+
+    index, values = best
+    schedule.p.assignVarsVals(values)
+    schedule.p.assignStatus(pulp.LpStatusOptimal, pulp.LpSolutionOptimal if proven
+                            else pulp.LpSolutionIntegerFeasible)
+
+    return configs[index]
+
+
+def _next_result(results, running, timeout):
+    """Wait up to `timeout` seconds for a configuration to report back.
+
+    A configuration whose process has exited without a result is reported
+    as having found no solution. Raises queue.Empty on timeout.
+
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    while True:
+        wait = POLL_INTERVAL
+
+        if deadline is not None:
+            wait = min(wait, deadline - time.monotonic())
+
+        try:
+            return results.get(timeout=max(wait, 0))
+        except queue.Empty:
+            pass
+
+        dead = [index for index, (process, _) in running.items() if process.exitcode is not None]
+
+        if dead:
+            # It may have reported just before exiting.
+            try:
+                return results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                return (dead[0], pulp.LpStatusUndefined, pulp.LpSolutionNoSolutionFound, None, {})
+
+        if deadline is not None and time.monotonic() >= deadline:
+            raise queue.Empty
+
+
+def _solve_config(index, args, config, time_limit, cutoff, results):
+    """Worker process: build and solve one configuration, report back"""
+
+    # Lead a new process group so that the solver subprocess is killed along
+    # with us if we lose the race.
+    os.setsid()
+
+    try:
+        schedule = Schedule(*args, symmetry_breaking=config.symmetry_breaking)
+
+        if cutoff is not None:
+            schedule.p += (
+                schedule.p.objective >= cutoff + CUTOFF_EPSILON,
+                "Portfolio cutoff",
+            )
+
+        schedule.p.solve(config.build(time_limit))
+    except Exception:
+        # Report the failure rather than leaving the parent waiting on us.
+        results.put((index, pulp.LpStatusUndefined, pulp.LpSolutionNoSolutionFound, None, {}))
+        raise
+
+    results.put((
+        index,
+        schedule.p.status,
+        schedule.p.sol_status,
+        schedule.p.objective.value(),
+        {v.name: v.varValue for v in schedule.p.variables()},
+    ))
+
+
+def kill_process_group(process):
+    """Kill a process which leads its own process group, and its children"""
+
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        process.kill()
+
+    process.join()
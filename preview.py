@@ -0,0 +1,329 @@
+"""A quick, approximate schedule from the LP relaxation of the model.
+
+Solving the full Mixed Integer Program can take a long time; solving its
+linear relaxation (where each X_i_p_g may take any value between 0 and 1)
+takes a fraction of a second. The fractional values are a strong hint at which
+game each player should play, so we round them randomly and then repair
+whatever constraints the rounding broke.
+
+Sessions with the fewest games to choose from are seated first. If repairing
+a session gets stuck, it is seated by a small MIP over just that session; if
+even that cannot seat it, given the games played in other sessions, we start
+again with a fresh rounding.
+
+The LP objective is an upper bound on the best possible schedule, which tells
+us how far from optimal the preview can be.
+"""
+import random
+
+import pulp
+
+
+class Preview:
+    def __init__(self, schedule, seed=None, attempts=10):
+        self.schedule = schedule
+        self.random = random.Random(seed)
+        self.attempts = attempts
+        self.lp_bound = None
+        self.objective = None
+
+    def solve(self):
+        """Returns an approximate solution, in the same format as Schedule.solve"""
+
+        s = self.schedule
+        s.p.solve(pulp.PULP_CBC_CMD(mip=False, msg=False))
+
+        if pulp.LpStatus[s.p.status] != 'Optimal':
+            raise RuntimeError("Problem not solvable")
+
+        self.lp_bound = s.p.objective.value()
+        self.titles = [{s.all_games[g] for g in games} for games in s.session_games]
+        self.attending = [set(players) for players in s.session_players]
+
+        # Choices in earlier sessions can leave no way to seat a later one,
+        # so if a rounding gets stuck we start again with a fresh one - paying
+        # less attention to the LP each time, as it may be all zeros and ones.
+        for attempt in range(self.attempts):
+            try:
+                return self._rounded(noise=max(1e-6, attempt / self.attempts))
+            except RuntimeError as e:
+                error = e
+
+        raise error
+
+    def _rounded(self, noise):
+        """Round and repair every session in turn, those with the fewest games
+        to choose from first
+
+        """
+        s = self.schedule
+        self.objective = 0.0
+        self.pending = set(range(len(s.sessions)))
+        played = [set() for _ in s.players]
+        result = [None] * len(s.sessions)
+
+        for i in sorted(self.pending, key=lambda i: len(self.titles[i])):
+            session = s.sessions[i]
+            self.pending.discard(i)
+            tables = self._round(i, played, noise)
+
+            try:
+                self._repair(i, session, tables, played)
+            except RuntimeError:
+                tables = self._assign(i, session, played)
+
+            for g, players in tables.items():
+                game = s.all_games[g]
+
+                for p in players:
+                    played[p].add(game)
+                    self.objective += s.roster[p].weight(game)
+
+                self.objective += s.games_db.popularity(game, len(players))
+
+            result[i] = sorted(
+                [(s.all_games[g], [s.players[p] for p in sorted(players)])
+                 for g, players in tables.items()],
+                key=lambda x: x[0],
+            )
+
+        return result
+
+    def _fraction(self, i, p, g):
+        return self.schedule.choices[i][p][g].varValue or 0.0
+
+    def _score(self, i, p, g):
+        """How much we would like player p at table g in session i"""
+
+        s = self.schedule
+
+        return self._fraction(i, p, g) + s.roster[p].weight(s.all_games[g])
+
+    def _eligible(self, i, p, g, played):
+        """Whether player p can play at table g in session i, without
+        playing a game twice or leaving too few games for the sessions they
+        have still to be seated in
+
+        """
+        s = self.schedule
+        game = s.all_games[g]
+
+        if game in played[p]:
+            return False
+
+        left = [
+            self.titles[j] - played[p] - {game}
+            for j in self.pending if p in self.attending[j]
+        ]
+
+        return all(left) and len(set().union(*left)) >= len(left)
+
+    def _round(self, i, played, noise):
+        """Randomly assign each player a game with probability X_i_p_g"""
+
+        s = self.schedule
+        tables = {}
+
+        for p in s.session_players[i]:
+            candidates = [g for g in s.session_games[i] if self._eligible(i, p, g, played)]
+
+            if not candidates:
+                raise RuntimeError(f"No game left for {s.roster[p].name} in session {i}")
+
+            # Some weight everywhere so that zeros can still be drawn.
+            weights = [self._fraction(i, p, g) + noise for g in candidates]
+            g = self.random.choices(candidates, weights)[0]
+            tables.setdefault(g, []).append(p)
+
+        return tables
+
+    def _repair(self, i, session, tables, played):
+        """Fix up player counts, the table limit and play-once in place.
+
+        Rounding only picks games a player has not played before, and every
+        move below keeps to that, so play-once always holds.
+
+        """
+        s = self.schedule
+        lo, hi = self._limits(i, session)
+        unplaced = []
+
+        # Too many players: the least keen players leave the table.
+        for g, players in tables.items():
+            players.sort(key=lambda p: self._score(i, p, g), reverse=True)
+            unplaced.extend(players[hi[g]:])
+            del players[hi[g]:]
+
+        # Too many tables: close the least valuable.
+        while len(tables) > s.table_limit:
+            g = min(tables, key=lambda g: sum(self._score(i, p, g) for p in tables[g]))
+            unplaced.extend(tables.pop(g))
+
+        closed = set()
+
+        for p in unplaced:
+            self._place(i, p, tables, hi, played, closed)
+
+        # Too few players: fill from tables that can spare someone, or close
+        # the table and move its players on - together if there is a table
+        # that can take them all, otherwise one by one. A closed table is not
+        # opened again this session, so this always comes to an end.
+        while True:
+            short = [g for g in tables if len(tables[g]) < lo[g]]
+
+            if not short:
+                break
+
+            g = min(short, key=lambda g: lo[g] - len(tables[g]))
+
+            if self._fill(i, g, tables, lo, played):
+                continue
+
+            players = tables.pop(g)
+            closed.add(g)
+
+            if not self._move_table(i, players, tables, lo, hi, played, closed):
+                for p in players:
+                    self._place(i, p, tables, hi, played, closed)
+
+    def _assign(self, i, session, played):
+        """Seat session i's players with a small MIP over just that session,
+        for when repairing the rounding gets stuck. Raises RuntimeError if
+        there is no way to seat them given the games already played
+
+        """
+        s = self.schedule
+        lo, hi = self._limits(i, session)
+        p = pulp.LpProblem(f"Preview_session_{i}", pulp.LpMaximize)
+        seats = {
+            (q, g): pulp.LpVariable(f"X_{q}_{g}", cat=pulp.LpBinary)
+            for q in s.session_players[i]
+            for g in s.session_games[i] if self._eligible(i, q, g, played)
+        }
+        opened = {
+            g: pulp.LpVariable(f"Open_{g}", cat=pulp.LpBinary) for g in s.session_games[i]
+        }
+
+        p += pulp.lpSum(self._score(i, q, g) * var for (q, g), var in seats.items())
+
+        for q in s.session_players[i]:
+            p += pulp.lpSum(var for (r, _), var in seats.items() if r == q) == 1
+
+        for g in s.session_games[i]:
+            seated = pulp.lpSum(var for (_, h), var in seats.items() if h == g)
+            p += seated >= lo[g] * opened[g]
+            p += seated <= hi[g] * opened[g]
+
+        p += pulp.lpSum(opened.values()) <= s.table_limit
+        p.solve(pulp.PULP_CBC_CMD(msg=False))
+
+        if pulp.LpStatus[p.status] != 'Optimal':
+            raise RuntimeError(f"Could not repair preview: no way to seat session {i}")
+
+        tables = {}
+
+        for (q, g), var in seats.items():
+            if var.varValue > 0.5:
+                tables.setdefault(g, []).append(q)
+
+        return tables
+
+    def _limits(self, i, session):
+        """The minimum and maximum players at each table in session i"""
+
+        s = self.schedule
+        lo = {g: s.games_db.min_players(s.all_games[g]) for g in s.session_games[i]}
+        hi = {g: s.games_db.max_players(s.all_games[g], session) for g in s.session_games[i]}
+
+        return lo, hi
+
+    def _new_tables(self, i, tables, closed):
+        """Tables that could still be opened in session i"""
+
+        s = self.schedule
+
+        if len(tables) >= s.table_limit:
+            return []
+
+        return [g for g in s.session_games[i] if g not in tables and g not in closed]
+
+    def _place(self, i, p, tables, hi, played, closed):
+        """Sit player p at the best table with a free seat, opening a new
+        table if there is none
+
+        """
+        s = self.schedule
+        open_tables = [
+            g for g in tables
+            if len(tables[g]) < hi[g] and self._eligible(i, p, g, played)
+        ]
+
+        if not open_tables:
+            open_tables = [
+                g for g in self._new_tables(i, tables, closed)
+                if self._eligible(i, p, g, played)
+            ]
+
+        if not open_tables:
+            raise RuntimeError(
+                f"Could not repair preview: no seat for {s.roster[p].name} in session {i}"
+            )
+
+        g = max(open_tables, key=lambda g: self._score(i, p, g))
+        tables.setdefault(g, []).append(p)
+
+    def _move_table(self, i, players, tables, lo, hi, played, closed):
+        """Move a closed table's players together: onto a table with room for
+        them all, or to a new table they are enough for. False if neither
+        exists
+
+        """
+        candidates = [
+            g for g in tables if len(tables[g]) + len(players) <= hi[g]
+        ] + [
+            g for g in self._new_tables(i, tables, closed)
+            if lo[g] <= len(players) <= hi[g]
+        ]
+        candidates = [
+            g for g in candidates
+            if all(self._eligible(i, p, g, played) for p in players)
+        ]
+
+        if not candidates:
+            return False
+
+        g = max(candidates, key=lambda g: sum(self._score(i, p, g) for p in players))
+        tables.setdefault(g, []).extend(players)
+
+        return True
+
+    def _fill(self, i, g, tables, lo, played):
+        """Move players from tables above their minimum to table g"""
+
+        donors = sorted(
+            [
+                (self._score(i, p, g) - self._score(i, p, h), p, h)
+                for h in tables if h != g and len(tables[h]) > lo[h]
+                for p in tables[h] if self._eligible(i, p, g, played)
+            ],
+            reverse=True,
+        )
+        moved = []
+
+        for _, p, h in donors:
+            if len(tables[g]) >= lo[g]:
+                break
+
+            if len(tables[h]) > lo[h]:
+                tables[h].remove(p)
+                tables[g].append(p)
+                moved.append((p, h))
+
+        if len(tables[g]) >= lo[g]:
+            return True
+
+        for p, h in moved:
+            tables[g].remove(p)
+            tables[h].append(p)
+
+        return False
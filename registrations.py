@@ -0,0 +1,219 @@
+"""Streaming ingestion and validation of player registrations.
+
+Registration exports can be large, and are often messy. Rather than loading
+them with one `json.load` and finding out about problems mid-solve, this reads
+them a record at a time - from JSON lines, or CSV with `;` separated lists:
+
+    name,owns,interests,sessions
+    Bob,1830,1830;1817,0;1;2
+
+- checks each record against the games database and the sessions, and builds
+the players list and per-session attendance for `Schedule` as it goes.
+
+Records that cannot be used are skipped and reported as errors, with their
+line number. Unknown game names (which may be prototypes, or typos) and
+duplicate names (the later registration wins) are reported as warnings.
+"""
+from argparse import ArgumentParser
+import csv
+import json
+import sys
+
+from schedule import GameDatabase, Schedule
+
+
+class Registrations:
+    def __init__(self, games_db, sessions):
+        self.games_db = games_db
+        self.sessions = sessions
+        self.players = []
+        self.errors = []
+        self.warnings = []
+        self.session_players = [set() for _ in sessions]
+        self._by_name = {}
+        self._titles = {}
+
+    @classmethod
+    def from_file(cls, path, games_db, sessions):
+        """Read registrations from a .jsonl, .csv or players.json style file.
+
+        For .json files, errors are numbered by entry rather than by line.
+
+        """
+        registrations = cls(games_db, sessions)
+
+        with open(path, newline='') as f:
+            if path.endswith('.csv'):
+                registrations.read_csv(f)
+            elif path.endswith('.json'):
+                registrations.read_json(f)
+            else:
+                registrations.read_jsonl(f)
+
+        return registrations
+
+    def read_json(self, f):
+        records = json.load(f)
+
+        if not isinstance(records, list):
+            self.errors.append((1, "Players must be a list"))
+            return
+
+        for entry, record in enumerate(records, 1):
+            self.add(entry, record)
+
+    def read_jsonl(self, lines):
+        for line_no, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                self.errors.append((line_no, f"Invalid JSON: {e}"))
+                continue
+
+            self.add(line_no, record)
+
+    def read_csv(self, lines):
+        reader = csv.DictReader(lines)
+
+        for record in reader:
+            line_no = reader.line_num
+
+            for key in ('owns', 'interests'):
+                record[key] = _split(record.get(key))
+
+            sessions = _split(record.get('sessions'))
+
+            if sessions:
+                try:
+                    record['sessions'] = [int(s) for s in sessions]
+                except ValueError:
+                    self.errors.append((line_no, f"Invalid sessions: {record['sessions']}"))
+                    continue
+            else:
+                record.pop('sessions', None)
+
+            self.add(line_no, record)
+
+    def add(self, line_no, record):
+        """Validate a single record and add it, or record why it was rejected"""
+
+        error = self._validate(record)
+
+        if error:
+            self.errors.append((line_no, error))
+            return
+
+        name = record['name']
+
+        player = {'name': name}
+
+        for key in ('owns', 'interests'):
+            player[key] = []
+
+            for title in record[key]:
+                if title not in self.games_db.games and title not in self._titles:
+                    self.warnings.append((line_no, f"Unknown game {title!r}"))
+
+                player[key].append(self._intern(title))
+
+        player['sessions'] = sorted(set(record.get('sessions', range(len(self.sessions)))))
+
+        if name in self._by_name:
+            i = self._by_name[name]
+            self.warnings.append((line_no, f"Duplicate registration for {name}, replacing"))
+
+            for s in self.players[i]['sessions']:
+                self.session_players[s].discard(i)
+
+            self.players[i] = player
+        else:
+            i = len(self.players)
+            self._by_name[name] = i
+            self.players.append(player)
+
+        for s in player['sessions']:
+            self.session_players[s].add(i)
+
+    def schedule(self, shared_games=[], table_limit=10, **kwargs):
+        """Returns a Schedule for the valid registrations"""
+
+        return Schedule(
+            self.games_db,
+            self.players,
+            self.sessions,
+            shared_games,
+            table_limit,
+            session_players=[sorted(players) for players in self.session_players],
+            **kwargs,
+        )
+
+    def _validate(self, record):
+        if not isinstance(record, dict):
+            return "Registration must be an object"
+
+        if not isinstance(record.get('name'), str) or not record['name'].strip():
+            return "Missing name"
+
+        for key in ('owns', 'interests'):
+            value = record.get(key, [])
+
+            if not isinstance(value, list) or not all(isinstance(g, str) for g in value):
+                return f"{key} must be a list of game names"
+
+            record[key] = value
+
+        if 'sessions' in record:
+            sessions = record['sessions']
+
+            if not isinstance(sessions, list) or not all(
+                    isinstance(s, int) and not isinstance(s, bool) for s in sessions
+            ):
+                return "sessions must be a list of session numbers"
+
+            invalid = [s for s in sessions if not 0 <= s < len(self.sessions)]
+
+            if invalid:
+                return f"No such sessions: {invalid}"
+
+            if not sessions:
+                return "Not attending any sessions"
+
+    def _intern(self, title):
+        """Share one string per game title between all players"""
+
+        return self._titles.setdefault(title, title)
+
+
+def _split(value):
+    return [x.strip() for x in (value or '').split(';') if x.strip()]
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Validate a registrations export')
+    parser.add_argument('--games', metavar='FILE', default='games.json', help='Games database json')
+    parser.add_argument(
+        '--sessions', metavar='FILE', default='sample/sessions.json', help='Session info json file',
+    )
+    parser.add_argument(
+        'registrations', metavar='FILE', help='Registrations, as .jsonl, .csv or .json',
+    )
+    args = parser.parse_args()
+
+    with open(args.sessions) as f:
+        sessions = json.load(f)
+
+    r = Registrations.from_file(args.registrations, GameDatabase.from_file(args.games), sessions)
+
+    for line_no, message in r.warnings:
+        print(f"{args.registrations}:{line_no}: warning: {message}")
+
+    for line_no, message in r.errors:
+        print(f"{args.registrations}:{line_no}: error: {message}")
+
+    print(f"{len(r.players)} players, {len(r.errors)} errors, {len(r.warnings)} warnings")
+
+    if r.errors:
+        sys.exit(1)
@@ -0,0 +1,260 @@
+"""Metrics for a solved schedule, by player, session and game.
+
+`Report` goes over a schedule once, counting for each seat whether the player
+wanted the game, and for each table how full it is against the game's
+maximum player count (for the time the table has - the session's length, or
+in packed schedules until its players' next tables) and what its player count
+contributes to the objective. Game lookups are made once per game and session
+or player count, not per seat, so even very large schedules report instantly.
+
+    players   satisfied interests against those that could plausibly be
+              (interests in games available at the event, up to one per
+              session), and the interests left unserved
+    sessions  tables, seats, fill and popularity per session
+    games     the same per game title, plus the players interested in it and
+              those of them who never got to play it
+
+Reports can be written as text, JSON or CSV (one section per file):
+
+    python report.py schedule.json
+    python report.py schedule.json --format csv --section games
+"""
+from argparse import ArgumentParser
+import csv
+import json
+import sys
+
+
+SECTIONS = ('players', 'sessions', 'games')
+
+
+class Report:
+    """`result` is as returned by Schedule.solve (or PackedSchedule.solve),
+    and `available` the games at the event - e.g. Schedule.all_games
+
+    """
+    def __init__(self, games_db, players, sessions, result, available):
+        available = set(available)
+        interests = {p['name']: set(p['interests']) for p in players}
+        played = {p['name']: set() for p in players}
+        satisfied_by = dict.fromkeys(interests, 0)
+        capacity = {}
+        popularity = {}
+
+        self.sessions = [
+            {
+                'session': session.get('name', str(i)),
+                'tables': 0,
+                'seats': 0,
+                'capacity': 0,
+                'satisfied': 0,
+                'popularity': 0.0,
+            }
+            for i, session in enumerate(sessions)
+        ]
+        games = {}
+
+        for i, tables in enumerate(result):
+            row = self.sessions[i]
+
+            for table, length in zip(tables, _table_lengths(tables, sessions[i]['length'])):
+                game, table_players = table[-2:]
+                n = len(table_players)
+
+                if (game, i, length) not in capacity:
+                    capacity[game, i, length] = games_db.max_players(
+                        game, {**sessions[i], 'length': length},
+                    )
+
+                if (game, n) not in popularity:
+                    popularity[game, n] = games_db.popularity(game, n)
+
+                satisfied = 0
+
+                for p in table_players:
+                    hit = game in interests[p['name']]
+                    played[p['name']].add(game)
+                    satisfied_by[p['name']] += hit
+                    satisfied += hit
+
+                for r in (row, games.setdefault(game, _game_row(game))):
+                    r['tables'] += 1
+                    r['seats'] += n
+                    r['capacity'] += capacity[game, i, length]
+                    r['satisfied'] += satisfied
+                    r['popularity'] += popularity[game, n]
+
+        self.players = []
+
+        for p in players:
+            wanted = interests[p['name']] & available
+            unserved = sorted(wanted - played[p['name']])
+
+            for game in wanted:
+                g = games.setdefault(game, _game_row(game))
+                g['interested'] += 1
+                g['unserved'] += game in unserved
+
+            self.players.append({
+                'player': p['name'],
+                'games': len(played[p['name']]),
+                'satisfied': satisfied_by[p['name']],
+                'plausible': min(len(wanted), len(sessions)),
+                'unserved': unserved,
+            })
+
+        self.games = sorted(games.values(), key=lambda g: g['game'])
+
+        for row in self.sessions + self.games:
+            row['fill'] = row['seats'] / row['capacity'] if row['capacity'] else 0.0
+
+        self.totals = {
+            'players': len(self.players),
+            'satisfied': sum(row['satisfied'] for row in self.sessions),
+            'plausible': sum(row['plausible'] for row in self.players),
+            'unserved': sum(len(row['unserved']) for row in self.players),
+            'tables': sum(row['tables'] for row in self.sessions),
+            'seats': sum(row['seats'] for row in self.sessions),
+            'capacity': sum(row['capacity'] for row in self.sessions),
+            'popularity': sum(row['popularity'] for row in self.sessions),
+        }
+        self.totals['fill'] = (
+            self.totals['seats'] / self.totals['capacity'] if self.totals['capacity'] else 0.0
+        )
+
+    def to_json(self):
+        return {'totals': self.totals, **{section: getattr(self, section) for section in SECTIONS}}
+
+    def write_json(self, f):
+        json.dump(self.to_json(), f, indent=2)
+        f.write('\n')
+
+    def write_csv(self, f, section='players'):
+        rows = getattr(self, section)
+        writer = csv.writer(f)
+
+        if rows:
+            writer.writerow(rows[0].keys())
+            writer.writerows(
+                [' '.join(v) if isinstance(v, list) else v for v in row.values()]
+                for row in rows
+            )
+
+    def write_text(self, f):
+        t = self.totals
+        lines = [
+            f"Satisfied {t['satisfied']} out of {t['plausible']} "
+            f"({t['unserved']} interests unserved)",
+            f"Seats {t['seats']} of {t['capacity']} at {t['tables']} tables "
+            f"({t['fill']:.0%} full)",
+            f"Popularity {t['popularity']:.3f}",
+            "",
+            f"{'Session':<20}{'Tables':>8}{'Seats':>8}{'Fill':>7}"
+            f"{'Satisfied':>11}{'Popularity':>12}",
+        ]
+        lines.extend(
+            f"{s['session']:<20}{s['tables']:>8}{s['seats']:>8}{s['fill']:>7.0%}"
+            f"{s['satisfied']:>11}{s['popularity']:>12.3f}"
+            for s in self.sessions
+        )
+        lines += [
+            "",
+            f"{'Game':<20}{'Tables':>8}{'Seats':>8}{'Fill':>7}"
+            f"{'Satisfied':>11}{'Unserved':>10}{'Popularity':>12}",
+        ]
+        lines.extend(
+            f"{g['game']:<20}{g['tables']:>8}{g['seats']:>8}{g['fill']:>7.0%}"
+            f"{g['satisfied']:>11}{g['unserved']:>10}{g['popularity']:>12.3f}"
+            for g in self.games
+        )
+
+        unlucky = [p for p in self.players if p['plausible'] and not p['satisfied']]
+
+        if unlucky:
+            lines += ["", f"No interests satisfied ({len(unlucky)}):"]
+            lines.extend(f"  {p['player']}: wanted {', '.join(p['unserved'])}" for p in unlucky)
+
+        f.write('\n'.join(lines) + '\n')
+
+    def write(self, f, output_format='text', section='players'):
+        if output_format == 'json':
+            self.write_json(f)
+        elif output_format == 'csv':
+            self.write_csv(f, section)
+        else:
+            self.write_text(f)
+
+
+def _table_lengths(tables, length):
+    """The minutes each table has. In packed schedules, where tables have a
+    start time, a table lasts until its players' next tables start (players
+    are at a table all session), or the end of the session
+
+    """
+    if not tables or len(tables[0]) != 3:
+        return [length] * len(tables)
+
+    starts = {}
+
+    for start, _, players in tables:
+        for p in players:
+            starts.setdefault(p['name'], []).append(start)
+
+    return [
+        min(
+            [s for p in players for s in starts[p['name']] if s > start],
+            default=length,
+        ) - start
+        for start, _, players in tables
+    ]
+
+
+def _game_row(game):
+    return {
+        'game': game,
+        'tables': 0,
+        'seats': 0,
+        'capacity': 0,
+        'satisfied': 0,
+        'popularity': 0.0,
+        'interested': 0,
+        'unserved': 0,
+    }
+
+
+if __name__ == '__main__':
+    from tools import load, load_result
+
+    parser = ArgumentParser(description='Report on a schedule file by player, session and game')
+    parser.add_argument('--games', metavar='FILE', default='games.json', help='Games database json')
+    parser.add_argument(
+        '--players', metavar='FILE', default='sample/players.json',
+        help='Players, as .json, .jsonl or .csv',
+    )
+    parser.add_argument(
+        '--sessions', metavar='FILE', default='sample/sessions.json', help='Session info json file',
+    )
+    parser.add_argument(
+        '--shared-games', nargs='*', metavar='GAMES', default=[], help='Shared games',
+    )
+    parser.add_argument(
+        '--format', choices=('text', 'json', 'csv'), default='text', help='Output format',
+    )
+    parser.add_argument(
+        '--section', choices=SECTIONS, default='players', help='Section to write as CSV',
+    )
+    parser.add_argument(
+        'schedule', metavar='FILE', help='Schedule json, as written by schedule.py --output',
+    )
+    args = parser.parse_args()
+
+    games_db, sessions, r = load(args)
+    available = set(args.shared_games) | {g for p in r.players for g in p['owns']}
+
+    try:
+        result = load_result(args.schedule, r)
+    except ValueError as error:
+        sys.exit(f"Error: {error}")
+
+    report = Report(games_db, r.players, sessions, result, available)
+    report.write(sys.stdout, args.format, args.section)
@@ -0,0 +1,391 @@
+"""Schedules that hold up when some players do not turn up.
+
+Some fraction of registered players never arrive, and the tables planned for
+them can fall below their minimum player count. Here we sample attendance
+scenarios - each player misses each of their sessions with some no-show
+probability - and for each scenario solve a repair problem: re-seat the
+players who did turn up, for the best objective less a cost for each player
+moved away from the game they were planned to play.
+
+Several base schedules are considered: the usual optimum, and schedules where
+every table is planned with a buffer of extra players above its minimum. The
+one whose scenarios can most often be repaired at all wins, and between those
+equally often repairable, the one with the best expected (mean repaired)
+objective.
+
+Scenarios are solved in parallel on a process pool. Scenario i is always the
+same for a given seed, and repair results can be kept in a cache file, so
+re-running with more scenarios only solves the new ones.
+"""
+from argparse import ArgumentParser
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import random
+
+import pulp
+
+from schedule import GameDatabase, InfeasibleError, Schedule, print_schedule, result_to_json
+
+
+def sample_scenarios(players, n_sessions, no_show, k, seed=0, start=0):
+    """Returns scenarios start..k-1: for each session, the players who are absent.
+
+    Each player misses each session they registered for independently, with
+    probability `player['no_show']` if given, else `no_show`.
+
+    """
+    scenarios = []
+
+    for n in range(start, k):
+        rng = random.Random(f'{seed}:{n}')
+        scenarios.append([
+            sorted(
+                p for p, player in enumerate(players)
+                if i in player.get('sessions', range(n_sessions)) and
+                rng.random() < player.get('no_show', no_show)
+            )
+            for i in range(n_sessions)
+        ])
+
+    return scenarios
+
+
+def solve_base(
+        games_db,
+        players,
+        sessions,
+        shared_games=[],
+        table_limit=10,
+        buffer=0,
+        time_limit=None,
+):
+    """Solve for a base schedule where every table has at least `buffer` more
+    players than its game's minimum (where the game allows).
+
+    Returns the result in the same format as Schedule.solve.
+
+    """
+    s = Schedule(games_db, players, sessions, shared_games, table_limit)
+
+    for i in s.session_ids:
+        for g, counts in s.games_played[i].items():
+            if buffer and len(counts) > 1:
+                s.p += (
+                    counts[0] <= counts[min(buffer, len(counts) - 1)],
+                    f"Buffer session {i} game {g}",
+                )
+
+    return s.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+
+
+def repair(
+        games_db,
+        players,
+        sessions,
+        shared_games,
+        table_limit,
+        base,
+        absent,
+        move_cost,
+        time_limit=None,
+):
+    """Re-seat the players who turned up, given a base schedule.
+
+    `base` is a schedule as from `result_to_json`, and `absent` the absent
+    players per session, as from `sample_scenarios`. Returns a dict with the
+    repaired objective (less `move_cost` per player not playing their planned
+    game), the number moved and whether a repair was possible at all. If not,
+    the objective and number moved are None.
+
+    """
+    present = [
+        {**player, 'sessions': [
+            i for i in player.get('sessions', range(len(sessions)))
+            if p not in absent[i]
+        ]}
+        for p, player in enumerate(players)
+    ]
+    planned = {
+        (i, name): table['game']
+        for i, tables in enumerate(base)
+        for table in tables
+        for name in table['players']
+    }
+
+    try:
+        s = Schedule(games_db, present, sessions, shared_games, table_limit)
+    except InfeasibleError:
+        return {'objective': None, 'moved': None, 'feasible': False}
+
+    stay = [
+        s.choices[i][p][k]
+        for i in s.session_ids
+        for p in s.session_players[i]
+        for k in s.session_games[i]
+        if planned.get((i, s.roster[p].name)) == s.all_games[k]
+    ]
+    attending = sum(len(players) for players in s.session_players)
+    moved = attending - pulp.lpSum(stay)
+
+    s.p.setObjective(s.interests_objective() + s.popularity_objective() - move_cost * moved)
+    s.p.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+
+    if pulp.LpStatus[s.p.status] != 'Optimal':
+        return {'objective': None, 'moved': None, 'feasible': False}
+
+    return {
+        'objective': s.p.objective.value(),
+        'moved': round(moved.value()),
+        'feasible': True,
+    }
+
+
+def _repair(args):
+    return repair(*args)
+
+
+def summarise(repairs):
+    """Returns the proportion of scenarios that could be repaired, and their
+    mean objective (None if there are none)
+
+    """
+    objectives = [r['objective'] for r in repairs if r['feasible']]
+
+    if not objectives:
+        return 0.0, None
+
+    return len(objectives) / len(repairs), sum(objectives) / len(objectives)
+
+
+def best_buffer(repairs):
+    """Returns the buffer whose scenarios are most often repairable, then with
+    the best mean objective, then the smallest, from repairs by buffer
+
+    """
+    def rank(buffer):
+        feasible, expected = summarise(repairs[buffer])
+
+        return feasible, -math.inf if expected is None else expected, -buffer
+
+    return max(repairs, key=rank)
+
+
+class ScenarioCache:
+    """Repair results, by a hash of everything that goes into them.
+
+    Kept in memory, and in a json file if `path` is given.
+
+    """
+    def __init__(self, path=None):
+        self.path = path
+        self.results = {}
+
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.results = json.load(f)
+
+    def get(self, key):
+        return self.results.get(key)
+
+    def put(self, key, result):
+        self.results[key] = result
+
+    def save(self):
+        if self.path:
+            with open(self.path, 'w') as f:
+                json.dump(self.results, f)
+
+
+def _key(*parts):
+    return hashlib.sha256(json.dumps(parts, sort_keys=True).encode()).hexdigest()
+
+
+class RobustSchedule:
+    def __init__(
+            self,
+            games_db,
+            players,
+            sessions,
+            shared_games=[],
+            table_limit=10,
+            no_show=0.1,
+            scenarios=20,
+            buffers=(0, 1),
+            move_cost=0.5,
+            seed=0,
+            cache=None,
+            processes=None,
+            time_limit=None,
+    ):
+        self.games_db = games_db
+        self.players = players
+        self.sessions = sessions
+        self.shared_games = shared_games
+        self.table_limit = table_limit
+        self.no_show = no_show
+        self.scenarios = scenarios
+        self.buffers = buffers
+        self.move_cost = move_cost
+        self.seed = seed
+        self.cache = cache if cache is not None else ScenarioCache()
+        self.processes = processes
+        self.time_limit = time_limit
+
+        # Filled in by solve: per buffer, the base schedule and the repair
+        # result for each scenario; and how many repairs were actually solved.
+        self.bases = {}
+        self.repairs = {}
+        self.solved = 0
+
+    def solve(self):
+        """Returns the base schedule most often repairable, with the best
+        expected objective.
+
+        The result is in the same format as Schedule.solve. `feasible` then
+        holds the proportion of scenarios repairable for each buffer,
+        `expected` the mean objective of those scenarios, and `buffer` the
+        buffer chosen.
+
+        """
+        inputs = _key(
+            self.games_db.games, self.players, self.sessions,
+            self.shared_games, self.table_limit, self.move_cost,
+        )
+        scenarios = sample_scenarios(
+            self.players, len(self.sessions), self.no_show, self.scenarios, self.seed,
+        )
+        results = {}
+        jobs = []
+
+        for buffer in self.buffers:
+            try:
+                result = solve_base(
+                    self.games_db, self.players, self.sessions,
+                    self.shared_games, self.table_limit, buffer, self.time_limit,
+                )
+            except RuntimeError:
+                # Including InfeasibleError
+                continue
+
+            base = result_to_json(result)
+            self.bases[buffer] = result
+
+            for n, absent in enumerate(scenarios):
+                key = _key(inputs, base, absent)
+                results[buffer, n] = self.cache.get(key)
+
+                if results[buffer, n] is None:
+                    jobs.append((buffer, n, key, (
+                        self.games_db, self.players, self.sessions, self.shared_games,
+                        self.table_limit, base, absent, self.move_cost, self.time_limit,
+                    )))
+
+        if not self.bases:
+            raise RuntimeError("Problem not solvable")
+
+        if jobs:
+            with multiprocessing.Pool(self.processes) as pool:
+                solved = pool.map(_repair, [job[-1] for job in jobs])
+
+                for (buffer, n, key, _), result in zip(jobs, solved):
+                    results[buffer, n] = result
+                    self.cache.put(key, result)
+
+            self.cache.save()
+
+        self.solved = len(jobs)
+        self.repairs = {
+            buffer: [results[buffer, n] for n in range(len(scenarios))]
+            for buffer in self.bases
+        }
+        self.feasible = {}
+        self.expected = {}
+
+        for buffer, repairs in self.repairs.items():
+            self.feasible[buffer], self.expected[buffer] = summarise(repairs)
+
+        self.buffer = best_buffer(self.repairs)
+
+        return self.bases[self.buffer]
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(
+        description='Schedule for the expected objective when some players do not turn up',
+    )
+    parser.add_argument(
+        '--games', metavar='FILE', default='games.json', help='Games database json',
+    )
+    parser.add_argument(
+        '--players', metavar='FILE', default='sample/players.json',
+        help='Player interests json file',
+    )
+    parser.add_argument(
+        '--sessions', metavar='FILE', default='sample/sessions.json',
+        help='Session info json file',
+    )
+    parser.add_argument(
+        '--table-limit', metavar='N', default=10, type=int, help='Tables per session',
+    )
+    parser.add_argument(
+        '--shared-games', nargs='*', metavar='GAMES', default=[], help='Shared games',
+    )
+    parser.add_argument(
+        '--no-show', metavar='P', default=0.1, type=float,
+        help='Chance a player misses a session, unless they have their own "no_show"',
+    )
+    parser.add_argument(
+        '--scenarios', metavar='N', default=20, type=int, help='Attendance scenarios to sample',
+    )
+    parser.add_argument(
+        '--buffers', nargs='+', metavar='N', default=[0, 1], type=int,
+        help='Extra players above the minimum to plan at each table, to try',
+    )
+    parser.add_argument(
+        '--move-cost', metavar='X', default=0.5, type=float, help='Objective lost per player moved',
+    )
+    parser.add_argument(
+        '--seed', metavar='N', default=0, type=int, help='Random seed for the scenarios',
+    )
+    parser.add_argument('--cache', metavar='FILE', help='Keep scenario results in this json file')
+    parser.add_argument('--processes', metavar='N', type=int, help='Scenarios to solve at once')
+    parser.add_argument(
+        '--time-limit', metavar='SECONDS', type=float, help='Time limit for each solve',
+    )
+    args = parser.parse_args()
+
+    with open(args.players) as f:
+        players = json.load(f)
+
+    with open(args.sessions) as f:
+        sessions = json.load(f)
+
+    r = RobustSchedule(
+        GameDatabase.from_file(args.games),
+        players,
+        sessions,
+        shared_games=args.shared_games,
+        table_limit=args.table_limit,
+        no_show=args.no_show,
+        scenarios=args.scenarios,
+        buffers=args.buffers,
+        move_cost=args.move_cost,
+        seed=args.seed,
+        cache=ScenarioCache(args.cache),
+        processes=args.processes,
+        time_limit=args.time_limit,
+    )
+    result = r.solve()
+    print_schedule(result, sessions)
+
+    for buffer, expected in r.expected.items():
+        objective = 'n/a' if expected is None else f"{expected:.3f}"
+        print(
+            f"Buffer {buffer}: {r.feasible[buffer]:.0%} of scenarios repairable, "
+            f"expected objective {objective}"
+        )
+
+    print(f"Chose buffer {r.buffer}, solved {r.solved} new scenarios")
@@ -1,10 +1,34 @@
 from argparse import ArgumentParser
 from itertools import islice
+import heapq
+import importlib.util
 import json
 import math
 import sys
 
-import pulp
+from domain import Player, Session, Table, make_copies
+
+
+def lazy_import(name):
+    """Returns a module which is only actually imported when first used.
+
+    So that importing this module (e.g. to check or render schedules) does not
+    pay for importing the solver.
+
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+
+    return module
+
+
+pulp = lazy_import('pulp')
 
 
 def window(seq, n=2):
@@ -19,6 +43,73 @@ def window(seq, n=2):
         yield result
 
 
+def result_to_json(result):
+    """Returns a solved schedule with player names instead of player dicts"""
+
+    return [
+        [{'game': game, 'players': [p['name'] for p in players]} for game, players in tables]
+        for tables in result
+    ]
+
+
+def print_schedule(result, sessions, packed=False, file=None):
+    """Print a solved schedule, marking players' interests with * (** if owned).
+
+    With `packed`, tables are (start, game, players) as from `PackedSchedule`.
+
+    """
+    lines = []
+
+    for i, session in enumerate(result):
+        lines.append(f"==== Session {sessions[i]['name']} ====")
+
+        for table in session:
+            if packed:
+                start, game, players = table
+                lines.append(f"## {game} (+{start} minutes) ##")
+            else:
+                game, players = table
+                lines.append(f"## {game} ##")
+
+            for player in players:
+                extra = ''
+
+                if game in player['interests']:
+                    extra = '*'
+
+                    if game in player['owns']:
+                        extra = '**'
+
+                lines.append(f"{player['name']}{extra}")
+
+            lines.append("")
+
+        lines.append("")
+
+    print(''.join(f'{line}\n' for line in lines), end='', file=file)
+
+
+def satisfied_interests(result, players, all_games, sessions):
+    """Returns (interests satisfied, interests that could plausibly be)"""
+
+    all_games = set(all_games)
+    total_plausible_interests = sum([
+        min(
+            len([g for g in p['interests'] if g in all_games]),
+            len(sessions)
+        )
+        for p in players
+    ])
+    satisfied = 0
+
+    for tables in result:
+        for table in tables:
+            game, table_players = table[-2:]
+            satisfied += len([p for p in table_players if game in p['interests']])
+
+    return satisfied, total_plausible_interests
+
+
 class GameDatabase:
     def __init__(self, games):
         self.games = games
@@ -80,6 +171,20 @@ class GameDatabase:
     def adjusted_popularity(self, game, n):
         return self._game(game)['adjusted_popularity'][n]
 
+    def popularity(self, game, n):
+        """Returns the objective contribution of playing a game with n players.
+
+        Nothing below the game's minimum player count, and no more than at its
+        maximum above it.
+
+        """
+        if n < self.min_players(game):
+            return 0.0
+
+        n = min(n, self._game(game)['max_players'])
+
+        return sum(self._game(game)['adjusted_popularity'][:n - self.min_players(game) + 1])
+
     def _game(self, game):
         if game in self.games:
             return self.games[game]
@@ -118,24 +223,64 @@ class GameDatabase:
             game['adjusted_popularity'] = result
 
 
+# Objectives that can be optimised in turn with `Schedule.solve_staged`.
+STAGES = ('interests', 'fairness', 'popularity')
+
+
+class InfeasibleError(RuntimeError):
+    """Raised when no schedule can satisfy the constraints.
+
+    `reasons` is a list of human readable explanations, where we have them.
+
+    """
+    def __init__(self, message, reasons=()):
+        self.reasons = list(reasons)
+        super().__init__('\n  * '.join([message] + self.reasons))
+
+
 class Schedule:
-    def __init__(self, games_db, players, sessions, shared_games=[], table_limit=10):
+    def __init__(
+            self,
+            games_db,
+            players,
+            sessions,
+            shared_games=[],
+            table_limit=10,
+            symmetry_breaking=False,
+            elastic=False,
+            session_players=None,
+            build_model=True,
+    ):
         self.games_db = games_db
         self.players = players
         self.sessions = sessions
         self.shared_games = shared_games
         self.table_limit = table_limit
-        self.all_games = shared_games.copy()
-        self.owned_by = [None] * len(shared_games)
-
-        for i, player in enumerate(self.players):
-            self.all_games.extend(player['owns'])
-            self.owned_by.extend([i] * len(player['owns']))
+        self.symmetry_breaking = symmetry_breaking
+        self.elastic = elastic
+        self.slacks = []
+        self.worst_off = None
+        self.copies = make_copies(shared_games, players)
+        self.all_games = [c.game for c in self.copies]
+        self.owned_by = [c.owner for c in self.copies]
 
         self.session_ids = list(range(len(self.sessions)))
-        self.session_players = self._make_session_players()
+        self.timetable = [Session.from_json(i, session) for i, session in enumerate(sessions)]
+        self.roster = self._make_roster()
+        self.session_players = session_players or self._make_session_players()
         self.session_games = self._make_session_games()
 
+        if not self.elastic:
+            reasons = self.check_feasibility()
+
+            if reasons:
+                raise InfeasibleError("Problem not solvable", reasons)
+
+        # Without a model, only the indexes above are available - e.g. for
+        # `streaming.write_lp`.
+        if not build_model:
+            return
+
         self.p = pulp.LpProblem('Schedule', pulp.LpMaximize)
 
         # Problem Variables.
@@ -150,54 +295,247 @@ class Schedule:
         self._add_player_count_constraints()
         self._add_uniqueness_constraints()
 
-    def solve(self):
+        if self.symmetry_breaking:
+            self._add_symmetry_breaking_constraints()
+
+        if self.elastic:
+            self._add_elastic_objective_function()
+
+    def solve(self, solver=None, portfolio=None, time_limit=None):
         """Returns a solution, if one exists, for the scheduling problem.
 
         The result is: [[(game, [player, ...]), ...], ...] - i.e. each session
         has a list of tuples, giving the game and the those playing.
 
+        If `portfolio` is given (a list of `portfolio.SolverConfig`, or True
+        for the default portfolio) the configurations are raced against each
+        other in separate processes - see `portfolio.solve_portfolio`.
+
         """
-        self.p.solve()
+        if portfolio:
+            from portfolio import DEFAULT_PORTFOLIO, solve_portfolio
+
+            if portfolio is True:
+                portfolio = DEFAULT_PORTFOLIO
+
+            solve_portfolio(self, portfolio, time_limit=time_limit)
+        else:
+            if solver is None and time_limit is not None:
+                solver = pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit)
+
+            self.p.solve(solver)
+
+        if self.p.status == pulp.LpStatusInfeasible and not self.elastic:
+            raise InfeasibleError("Problem not solvable", self.diagnose())
 
         if pulp.LpStatus[self.p.status] != 'Optimal':
             raise RuntimeError("Problem not solvable")
 
-        result = []
+        return self._result()
 
-        for i in self.session_ids:
-            result.append([])
+    def solve_staged(self, stages=STAGES, tolerance=1e-6, solver=None):
+        """Optimise several objectives in order of priority.
 
-            for g in self.session_games[i]:
-                game = self.all_games[g]
+        Each of `stages` names an objective (see `STAGES`). The model is built
+        once; after each stage is solved, its objective is fixed (to within a
+        relative `tolerance`) as a constraint and the next objective is
+        swapped in, warm-started from the previous solution. This avoids
+        having to weight objectives against each other.
+
+        Returns a solution in the same format as `solve`. The optimal value of
+        each stage is stored in `stage_values`. Afterwards the stage
+        constraints are removed and the original objective restored.
+
+        """
+        self.stage_values = {}
+        original = self.p.objective
+        bounds = []
+
+        if solver is None:
+            solver = pulp.PULP_CBC_CMD(msg=False)
+        else:
+            solver = solver.copy()
+
+        try:
+            for n, stage in enumerate(stages):
+                objective = getattr(self, f'{stage}_objective')()
+
+                if not isinstance(objective, pulp.LpAffineExpression):
+                    objective = pulp.LpAffineExpression(objective)
+
+                self.p.setObjective(objective)
+                self.p.solve(solver)
+
+                if self.p.status == pulp.LpStatusInfeasible and not self.elastic:
+                    raise InfeasibleError("Problem not solvable", self.diagnose())
+
+                if pulp.LpStatus[self.p.status] != 'Optimal':
+                    raise RuntimeError("Problem not solvable")
+
+                value = objective.value()
+                self.stage_values[stage] = value
+                bound = objective >= value - tolerance * max(1, abs(value))
+                self.p += (bound, f"Stage {n} {stage}")
+                bounds.append(bound.name)
+
+                # Later stages start from this solution
+                solver.optionsDict = {**solver.optionsDict, 'warmStart': True}
+
+            return self._result()
+        finally:
+            # Leave the model as it was, so it can be solved again
+            for name in bounds:
+                del self.p.constraints[name]
+
+            self.p.setObjective(original)
+
+    def check_feasibility(self):
+        """Returns reasons the problem obviously cannot be solved, if any.
+
+        These are cheap, necessary (but not sufficient) conditions, checked
+        before we go to the expense of building and solving the model.
+
+        """
+        reasons = []
+
+        for i, session in enumerate(self.timetable):
+            attendees = len(self.session_players[i])
+            games = [self.all_games[j] for j in self.session_games[i]]
+
+            if not attendees:
+                continue
+
+            if not games:
+                reasons.append(
+                    f"Session {session.name}: no game fits in "
+                    f"{session.length} minutes for {attendees} players"
+                )
+                continue
+
+            fewest = min(self.games_db.min_players(g) for g in games)
+
+            if attendees < fewest:
+                reasons.append(
+                    f"Session {session.name}: {attendees} players is fewer "
+                    f"than the {fewest} needed by any game"
+                )
+
+            seats = sum(heapq.nlargest(
+                self.table_limit,
+                (self.games_db.max_players(g, self.sessions[i]) for g in games),
+            ))
+
+            if attendees > seats:
+                reasons.append(
+                    f"Session {session.name}: {attendees} players but only "
+                    f"{seats} seats at {self.table_limit} tables"
+                )
+
+        session_titles = [
+            {self.all_games[j] for j in self.session_games[i]}
+            for i in self.session_ids
+        ]
+
+        for player in self.roster:
+            # Sessions without any games are reported above.
+            attending = [
+                i for i in player.sessions
+                if i in self.session_ids and session_titles[i]
+            ]
+            titles = set().union(*[session_titles[i] for i in attending])
+
+            if len(titles) < len(attending):
+                reasons.append(
+                    f"Player {player.name}: attends {len(attending)} sessions "
+                    f"but only {len(titles)} different games are available to them"
+                )
+
+        return reasons
+
+    def diagnose(self):
+        """Explain why the problem is infeasible.
+
+        Solves an elastic copy of the problem, where players may go unseated,
+        sessions may exceed the table limit and players may repeat games - each
+        at a cost - and reports the cheapest set of relaxations that makes the
+        problem solvable.
+
+        """
+        elastic = self._copy(elastic=True)
+        elastic.p.solve(pulp.PULP_CBC_CMD(msg=False))
+
+        return [reason for var, reason in elastic.slacks if var.varValue and var.varValue > 1e-6]
+
+    def _copy(self, **kwargs):
+        """Returns a new Schedule for the same inputs, with different options"""
+
+        return Schedule(
+            self.games_db,
+            self.players,
+            self.sessions,
+            self.shared_games,
+            self.table_limit,
+            **kwargs,
+        )
+
+    def _result(self):
+        """Read the schedule back out of the solved choice variables"""
+
+        result = [[] for _ in self.session_ids]
+
+        for table in self.tables():
+            result[table.session].append((
+                self.all_games[table.copy],
+                [self.players[p] for p in table.players],
+            ))
+
+        return [sorted(tables, key=lambda x: x[0]) for tables in result]
+
+    def tables(self):
+        """Returns the solved schedule as a list of `domain.Table`"""
+
+        tables = []
 
+        for i in self.session_ids:
+            for g in self.session_games[i]:
                 players = [
-                    self.players[p]
-                    for p in self.session_players[i]
+                    p for p in self.session_players[i]
                     if self.choices[i][p][g].varValue
                 ]
 
                 if players:
-                    result[i].append((game, players))
+                    tables.append(Table(i, g, players))
 
-            result[i] = sorted(result[i], key=lambda x: x[0])
+        return tables
 
-        return result
+    def _slack(self, reason):
+        """Returns a slack variable to relax a constraint by, in elastic mode"""
 
-    def _make_session_players(self):
-        """Figure out who is available in each session"""
+        if not self.elastic:
+            return 0
 
-        for p in self.players:
-            if 'sessions' not in p:
-                p['sessions'] = self.session_ids
+        var = pulp.LpVariable(f'S_{len(self.slacks)}', lowBound=0, cat='Integer')
+        self.slacks.append((var, reason))
 
-        session_players = []
+        return var
 
-        for i in self.session_ids:
-            session_players.append([])
+    def _make_roster(self):
+        """Players as `domain.Player`, attending all sessions unless specified"""
+
+        return [
+            Player.from_json(i, player, self.session_ids)
+            for i, player in enumerate(self.players)
+        ]
 
-            for j, player in enumerate(self.players):
-                if i in player['sessions']:
-                    session_players[i].append(j)
+    def _make_session_players(self):
+        """Figure out who is available in each session"""
+
+        session_players = [[] for _ in self.session_ids]
+
+        for player in self.roster:
+            for i in sorted(player.sessions):
+                if i in self.session_ids:
+                    session_players[i].append(player.id)
 
         return session_players
 
@@ -206,23 +544,22 @@ class Schedule:
 
         session_games = []
 
-        for i, session in enumerate(self.sessions):
+        for i, session in enumerate(self.timetable):
+            present = set(self.session_players[i])
+
             session_games.append([
-                    j for j, game in enumerate(self.all_games)
-                    if self._game_available(session, game, i, j)
+                    copy.id for copy in self.copies
+                    if self._game_available(session, copy, present)
             ])
 
         return session_games
 
-    def _game_available(self, session, game, session_idx, game_idx):
+    def _game_available(self, session, copy, present):
         """Returns true if the game is of appropriate length and exists"""
 
         return (
-            (
-                self.owned_by[game_idx] is None or
-                self.owned_by[game_idx] in self.session_players[session_idx]
-            ) and
-            self.games_db.min_playtime(game) <= session['length']
+            (copy.owner is None or copy.owner in present) and
+            self.games_db.min_playtime(copy.game) <= session.length
         )
 
     def _make_choice_variables(self):
@@ -290,7 +627,15 @@ class Schedule:
         sum. In the simple case the weight is 1.0 if the game is in the
         player's interests list, and 0.0 if it isn't.
 
+        Added to this is the popularity of the player count each game is
+        played at.
+
         """
+        self.p += self.interests_objective() + self.popularity_objective()
+
+    def interests_objective(self):
+        """Returns the sum of players' interest in the games they play"""
+
         objective = []
 
         for i in self.session_ids:
@@ -299,9 +644,17 @@ class Schedule:
                     game = self.all_games[k]
 
                     objective.append(
-                        self.choices[i][p][k] * self.weight(self.players[p], game)
+                        self.choices[i][p][k] * self.roster[p].weight(game)
                     )
 
+        return pulp.lpSum(objective)
+
+    def popularity_objective(self):
+        """Returns the sum of the popularity of each game's player count"""
+
+        objective = []
+
+        for i in self.session_ids:
             for g in self.games_played[i]:
                 game = self.all_games[g]
 
@@ -310,7 +663,59 @@ class Schedule:
                         self.games_db.adjusted_popularity(game, count_idx) * count_var
                     )
 
-        self.p += pulp.lpSum(objective)
+        return pulp.lpSum(objective)
+
+    def fairness_objective(self):
+        """Returns the satisfaction of the worst-off player.
+
+        A player's satisfaction is the proportion of the sessions they could
+        possibly have had one of their interests in that they do (see
+        `_interests_served`). Players who have no interests in available
+        games are ignored.
+
+        The auxiliary variable and constraints this needs are only added to
+        the model the first time this is called.
+
+        """
+        if self.worst_off is not None:
+            return self.worst_off
+
+        self.worst_off = pulp.LpVariable('Worst_off', lowBound=0, upBound=1)
+        available = set(self.all_games)
+
+        for p, player in enumerate(self.roster):
+            served = self._interests_served(p, player)
+            plausible = min(len(player.interests & available), len(served))
+
+            if not plausible:
+                continue
+
+            self.p += (
+                self.worst_off * plausible <= pulp.lpSum(served),
+                f"Worst off player {p}",
+            )
+
+        return self.worst_off
+
+    def _interests_served(self, p, player):
+        """Returns, for each session player p attends, an expression that is
+        1 if they play one of their interests in it and 0 if not
+
+        """
+        return [
+            pulp.lpSum(
+                self.choices[i][p][k]
+                for k in self.session_games[i]
+                if self.all_games[k] in player.interests
+            )
+            for i in self.session_ids if p in self.choices[i]
+        ]
+
+    def _add_elastic_objective_function(self):
+        """In elastic mode, find the fewest relaxations that allow a solution"""
+
+        self.p.sense = pulp.LpMinimize
+        self.p.setObjective(pulp.lpSum(var for var, _ in self.slacks))
 
     def _add_logical_play_constraints(self):
         """Enforce logical constraints.
@@ -321,28 +726,39 @@ class Schedule:
         """
         for i in self.session_ids:
             for j in self.session_players[i]:
+                unseated = self._slack(
+                    f"Session {self.timetable[i].name}: player {self.roster[j].name} "
+                    "cannot be seated",
+                )
                 self.p += (
-                    pulp.lpSum(self.choices[i][j].values()) == 1,
+                    pulp.lpSum(self.choices[i][j].values()) + unseated == 1,
                     f"Game Per Session session {i} player {j}",
                 )
 
-            games_played = []
-            for g in self.games_played[i]:
-                previous_count = self.games_played[i][g][0]
-                games_played.append(previous_count)  # Store for the table count constraint
-
-                for c, count_var in enumerate(self.games_played[i][g][1:]):
-                    self.p += (
-                        previous_count >= count_var,
-                        f"Increasing player count {i} {g} {c}",
-                    )
-                    previous_count = count_var
+            self._add_increasing_count_constraints(i)
 
+            games_played = [counts[0] for counts in self.games_played[i].values()]
+            extra_tables = self._slack(
+                f"Session {self.timetable[i].name}: needs more than {self.table_limit} tables",
+            )
             self.p += (
-                pulp.lpSum(games_played) <= self.table_limit,
+                pulp.lpSum(games_played) <= self.table_limit + extra_tables,
                 f"Table limit session session {i}",
             )
 
+    def _add_increasing_count_constraints(self, i):
+        """A game must be played with n players to be played with n+1"""
+
+        for g in self.games_played[i]:
+            previous_count = self.games_played[i][g][0]
+
+            for c, count_var in enumerate(self.games_played[i][g][1:]):
+                self.p += (
+                    previous_count >= count_var,
+                    f"Increasing player count {i} {g} {c}",
+                )
+                previous_count = count_var
+
     def _add_player_count_constraints(self):
         """Games have a minimum and maximum player count"""
 
@@ -368,11 +784,12 @@ class Schedule:
     def _add_uniqueness_constraints(self):
         """Make sure that players do not play games more than once"""
 
-        for i, _ in enumerate(self.players):
-            unique_games = set(self.all_games)
+        copies_of = {}
+        for copy in self.copies:
+            copies_of.setdefault(copy.game, []).append(copy.id)
 
-            for game in unique_games:
-                indexes = [x for x, g in enumerate(self.all_games) if g == game]
+        for i, _ in enumerate(self.roster):
+            for game, indexes in copies_of.items():
                 variables = []
 
                 for j in indexes:
@@ -383,7 +800,36 @@ class Schedule:
                 # We only need a constraint if there is more than one
                 # opportunity to play a game.
                 if len(variables) > 1:
-                    self.p += pulp.lpSum(variables) <= 1, f"Play once player {i} game {game}"
+                    repeats = self._slack(
+                        f"Player {self.roster[i].name}: must play {game} more than once",
+                    )
+                    self.p += (
+                        pulp.lpSum(variables) <= 1 + repeats,
+                        f"Play once player {i} game {game}",
+                    )
+
+    def _add_symmetry_breaking_constraints(self):
+        """Optionally order interchangeable copies of the same game.
+
+        Copies of a game available in the same session are indistinguishable
+        to the objective function, so the solver can waste time exploring
+        permutations of the same schedule. Requiring that a copy is only used
+        if the previous copy is removes these - at the cost of a slightly
+        bigger model, so this is not always a win.
+
+        """
+        for i in self.session_ids:
+            copies = {}
+
+            for j in self.session_games[i]:
+                copies.setdefault(self.all_games[j], []).append(j)
+
+            for game, indexes in copies.items():
+                for a, b in window(indexes, 2):
+                    self.p += (
+                        self.games_played[i][a][0] >= self.games_played[i][b][0],
+                        f"Copy order session {i} game {game} {b}",
+                    )
 
     def weight(self, player, game):
         """Returns how interested a player is in a game.
@@ -400,78 +846,185 @@ class Schedule:
           other games, and further, this player is given priority to playing
           that game over others.
 
+        `player` may be a players.json style dict or a `domain.Player`.
+
         """
-        if game in player['interests']:
-            if game in player['owns']:
-                return 1.05
-            else:
-                return 1.0
-        else:
-            return 0.0
+        if not isinstance(player, Player):
+            player = Player.from_json(None, player)
+
+        return player.weight(game)
 
 
 if __name__ == '__main__':
     parser = ArgumentParser()
     parser.add_argument('--spec', action='store_true', help='Print out the problem specification instead of solving')
     parser.add_argument('--games', metavar='FILE', default='games.json', help='Games database json')
-    parser.add_argument('--players', metavar='FILE', default='sample/players.json', help='Player interests json file')
+    parser.add_argument(
+        '--players', metavar='FILE', default='sample/players.json',
+        help='Player interests json (or .jsonl/.csv) file',
+    )
     parser.add_argument('--sessions', metavar='FILE', default='sample/sessions.json', help='Session info json file')
     parser.add_argument('--table-limit', metavar='N', default=10, type=int, help='Session info json file')
     parser.add_argument('--shared-games', nargs='*', metavar='GAMES', default=[], help='Session info json file')
+    parser.add_argument(
+        '--portfolio', action='store_true', help='Race several solver configurations in parallel',
+    )
+    parser.add_argument(
+        '--time-limit', metavar='SECONDS', type=float, help='Give up searching after this long',
+    )
+    parser.add_argument(
+        '--preview', action='store_true', help='Quick approximate schedule from the LP relaxation',
+    )
+    parser.add_argument('--seed', metavar='N', type=int, help='Random seed for --preview rounding')
+    parser.add_argument(
+        '--granularity', metavar='MINUTES', type=int, help='Pack back-to-back games into sessions',
+    )
+    parser.add_argument('--output', metavar='FILE', help='Also write the schedule as json')
+    parser.add_argument(
+        '--stages', nargs='+', choices=STAGES, metavar='STAGE',
+        help='Optimise objectives in turn (--time-limit applies to each)',
+    )
+    parser.add_argument(
+        '--streaming', action='store_true', help='Write the model straight to an LP file for CBC',
+    )
+    parser.add_argument(
+        '--db', metavar='FILE', help='Also store the schedule in this SQLite database',
+    )
+    parser.add_argument('--label', help='Label for the schedule stored with --db')
+    parser.add_argument(
+        '--report', metavar='FILE', help='Also write a report by player, session and game',
+    )
+    parser.add_argument(
+        '--report-section', choices=('players', 'sessions', 'games'), default='players',
+        help='Section to write when --report is a .csv file',
+    )
     args = parser.parse_args()
 
-    with open(args.players) as f:
-        players = json.load(f)
+    if args.granularity and (args.preview or args.portfolio or args.output):
+        parser.error('--granularity cannot be combined with --preview, --portfolio or --output')
+
+    if args.stages and (args.preview or args.portfolio):
+        parser.error('--stages cannot be combined with --preview or --portfolio')
+
+    if args.streaming and (
+            args.granularity or args.stages or args.preview or args.portfolio or args.spec
+    ):
+        parser.error('--streaming cannot be combined with other solving options')
 
     with open(args.sessions) as f:
         sessions = json.load(f)
 
     games = GameDatabase.from_file(args.games)
 
-    s = Schedule(
-        games,
-        players,
-        sessions,
-        shared_games=args.shared_games,
-        table_limit=args.table_limit,
-    )
+    registrations = None
 
-    if args.spec:
-        print(s.p)
-        sys.exit(0)
+    if args.players.endswith(('.jsonl', '.csv')):
+        from registrations import Registrations
 
-    result = s.solve()
+        registrations = Registrations.from_file(args.players, games, sessions)
 
-    total_plausible_interests = sum([
-        min(
-            len([g for g in p['interests'] if g in s.all_games]),
-            len(sessions)
-        )
-        for p in players
-    ])
-    satisfied_interests = 0
+        for line_no, message in registrations.warnings:
+            print(f"{args.players}:{line_no}: warning: {message}", file=sys.stderr)
 
-    for i, session in enumerate(result):
-        print(f"==== Session {sessions[i]['name']} ====")
+        for line_no, message in registrations.errors:
+            print(f"{args.players}:{line_no}: skipped: {message}", file=sys.stderr)
 
-        for game, players in session:
-            print(f"## {game} ##")
+        players = registrations.players
+    else:
+        with open(args.players) as f:
+            players = json.load(f)
 
-            for player in players:
-                extra = ''
+    try:
+        if args.granularity:
+            from packing import PackedSchedule
 
-                if game in player['interests']:
-                    satisfied_interests += 1
-                    extra = '*'
+            s = PackedSchedule(
+                games,
+                players,
+                sessions,
+                shared_games=args.shared_games,
+                table_limit=args.table_limit,
+                granularity=args.granularity,
+            )
+        elif registrations:
+            s = registrations.schedule(
+                shared_games=args.shared_games,
+                table_limit=args.table_limit,
+                build_model=not args.streaming,
+            )
+        else:
+            s = Schedule(
+                games,
+                players,
+                sessions,
+                shared_games=args.shared_games,
+                table_limit=args.table_limit,
+                build_model=not args.streaming,
+            )
 
-                    if game in player['owns']:
-                        extra = '**'
+        if args.spec:
+            print(s.p)
+            sys.exit(0)
+
+        if args.preview:
+            from preview import Preview
+
+            preview = Preview(s, seed=args.seed)
+            result = preview.solve()
+        elif args.stages:
+            result = s.solve_staged(
+                args.stages, solver=pulp.PULP_CBC_CMD(msg=False, timeLimit=args.time_limit),
+            )
+        elif args.streaming:
+            import streaming
+
+            result, objective = streaming.solve(s, time_limit=args.time_limit)
+        else:
+            result = s.solve(portfolio=args.portfolio, time_limit=args.time_limit)
+    except InfeasibleError as e:
+        sys.exit(str(e))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(result_to_json(result), f, indent=2)
+
+    if args.db:
+        from store import ScheduleStore
+
+        if args.preview:
+            objective = preview.objective
+        elif not args.streaming:
+            objective = s.p.objective.value()
+
+        store = ScheduleStore(args.db)
+        run = store.add_run(result, sessions, label=args.label, objective=objective)
+        store.close()
+        print(f"Stored as run {run} in {args.db}", file=sys.stderr)
+
+    print_schedule(result, sessions, packed=bool(args.granularity))
+    satisfied, total_plausible_interests = satisfied_interests(
+        result, players, s.all_games, sessions,
+    )
+    print(f"Satisfied {satisfied} out of {total_plausible_interests}")
+
+    if args.preview:
+        print(f"Objective function: {preview.objective} (LP upper bound: {preview.lp_bound})")
+    elif args.stages:
+        for stage, value in s.stage_values.items():
+            print(f"Objective {stage}: {value}")
+    elif args.streaming:
+        print(f"Objective function: {objective}")
+    else:
+        print(f"Objective function: {s.p.objective.value()}")
 
-                print(f"{player['name']}{extra}")
+    if args.report:
+        from report import Report
 
-            print("")
+        report = Report(games, players, sessions, result, s.all_games)
+        report_format = args.report.rsplit('.', 1)[-1]
 
-        print("")
+        if report_format not in ('json', 'csv'):
+            report_format = 'text'
 
-    print(f"Satisfied {satisfied_interests} out of {total_plausible_interests}")
-    print(f"Objective function: {s.p.objective.value()}")
+        with open(args.report, 'w', newline='') as f:
+            report.write(f, report_format, args.report_section)
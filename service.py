@@ -0,0 +1,453 @@
+"""A long running scheduling service.
+
+Running `schedule.py` for every request pays for interpreter startup, imports
+and loading the games database each time. Instead this keeps the games
+database loaded and accepts jobs over a local HTTP API:
+
+    POST   /jobs              submit a job, returns its id
+    GET    /jobs              list all jobs
+    GET    /jobs/<id>         job status, and the result once done
+    GET    /jobs/<id>/events  stream of status updates, one JSON per line
+    DELETE /jobs/<id>         cancel a job
+
+A job is a JSON object with `players` and `sessions` (as in players.json and
+sessions.json), and optionally `shared_games`, `table_limit` and `time_limit`
+(in seconds).
+
+Jobs wait in a bounded queue for one of a pool of workers. Each job is solved
+in its own process, so that it can be killed if it is cancelled or overruns
+its time limit. Only the most recently finished jobs (`keep_finished`) are
+kept, with their results; older ones are forgotten.
+"""
+from argparse import ArgumentParser
+import collections
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pulp
+
+from portfolio import kill_process_group
+from schedule import GameDatabase, InfeasibleError, Schedule, result_to_json
+
+
+# How long past its time limit we give a job to report back before killing it.
+GRACE_PERIOD = 10
+
+FINISHED = ('done', 'failed', 'cancelled')
+
+
+class Job:
+    def __init__(self, id, spec):
+        self.id = id
+        self.spec = spec
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.reasons = []
+        self.process = None
+        self.version = 0
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    def to_dict(self, result=True):
+        d = {
+            'id': self.id,
+            'status': self.status,
+            'submitted': self.submitted,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+        if self.error:
+            d['error'] = self.error
+            d['reasons'] = self.reasons
+
+        if result and self.result is not None:
+            d['result'] = self.result
+
+        return d
+
+
+class Service:
+    """Runs scheduling jobs against a loaded GameDatabase on a worker pool"""
+
+    def __init__(
+            self,
+            games_db,
+            workers=2,
+            queue_size=16,
+            default_time_limit=300,
+            keep_finished=1000,
+    ):
+        self.games_db = games_db
+        self.default_time_limit = default_time_limit
+        self.keep_finished = keep_finished
+        self.jobs = {}
+        self.finished = collections.deque()
+        self.ids = itertools.count(1)
+        self.queue = queue.Queue(queue_size)
+        self.changed = threading.Condition()
+        self.workers = [
+            threading.Thread(target=self._work, daemon=True)
+            for _ in range(workers)
+        ]
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+
+    def stop(self):
+        """Cancel everything and stop the workers"""
+
+        for job in self.all_jobs():
+            self.cancel(job.id)
+
+        for _ in self.workers:
+            self.queue.put(None)
+
+        for worker in self.workers:
+            worker.join()
+
+    def submit(self, spec):
+        """Queue a job. Raises ValueError if the spec is invalid, queue.Full if busy"""
+
+        if not isinstance(spec, dict):
+            raise ValueError("Job must be a JSON object")
+
+        for key in ('players', 'sessions'):
+            if not isinstance(spec.get(key), list):
+                raise ValueError(f"Job must have a list of {key}")
+
+        time_limit = spec.get('time_limit')
+
+        if time_limit is not None and (
+                isinstance(time_limit, bool) or
+                not isinstance(time_limit, (int, float)) or
+                not time_limit > 0
+        ):
+            raise ValueError("Job time_limit must be a positive number of seconds")
+
+        with self.changed:
+            job = Job(str(next(self.ids)), spec)
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+
+        return job
+
+    def all_jobs(self):
+        """Returns all the jobs still kept"""
+
+        with self.changed:
+            return list(self.jobs.values())
+
+    def cancel(self, id):
+        """Cancel a job, killing it if it is running. Returns the job"""
+
+        with self.changed:
+            job = self.jobs[id]
+
+            if job.status in FINISHED:
+                return job
+
+            if job.process is not None:
+                kill_process_group(job.process)
+
+            self._update(job, 'cancelled')
+
+        return job
+
+    def wait(self, job, version, timeout=None):
+        """Block until the job changes from `version`, or timeout"""
+
+        with self.changed:
+            self.changed.wait_for(lambda: job.version != version, timeout)
+
+    def _update(self, job, status, **attrs):
+        """Change job state. Must be called holding `self.changed`"""
+
+        job.status = status
+
+        for k, v in attrs.items():
+            setattr(job, k, v)
+
+        if status == 'running':
+            job.started = time.time()
+        elif status in FINISHED:
+            job.finished = time.time()
+            job.process = None
+            self.finished.append(job.id)
+
+            while len(self.finished) > self.keep_finished:
+                del self.jobs[self.finished.popleft()]
+
+        job.version += 1
+        self.changed.notify_all()
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+
+            if job is None:
+                break
+
+            try:
+                self._run(job)
+            except Exception as e:
+                # Fail the job rather than lose the worker
+                with self.changed:
+                    if job.status not in FINISHED:
+                        if job.process is not None:
+                            kill_process_group(job.process)
+
+                        self._update(job, 'failed', error=str(e))
+
+    def _run(self, job):
+        time_limit = job.spec.get('time_limit') or self.default_time_limit
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(
+            target=_solve_job,
+            args=(self.games_db, job.spec, time_limit, writer),
+            daemon=True,
+        )
+
+        with self.changed:
+            if job.status == 'cancelled':
+                return
+
+            process.start()
+            self._update(job, 'running', process=process)
+
+        writer.close()
+
+        try:
+            message = reader.recv() if reader.poll(time_limit + GRACE_PERIOD) else None
+        except EOFError:
+            message = None
+
+        with self.changed:
+            if job.status == 'cancelled':
+                return
+
+            if message is None:
+                kill_process_group(process)
+                self._update(job, 'failed', error="Job did not finish in time")
+            else:
+                status, attrs = message
+                self._update(job, status, **attrs)
+
+        process.join()
+
+
+def _solve_job(games_db, spec, time_limit, conn):
+    """Job process: solve one schedule and send the outcome back"""
+
+    # Lead a new process group so that the solver is killed if we are.
+    os.setsid()
+
+    try:
+        schedule = Schedule(
+            games_db,
+            spec['players'],
+            spec['sessions'],
+            shared_games=spec.get('shared_games', []),
+            table_limit=spec.get('table_limit', 10),
+        )
+        result = schedule.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    except InfeasibleError as e:
+        conn.send(('failed', {'error': "Problem not solvable", 'reasons': e.reasons}))
+    except Exception as e:
+        conn.send(('failed', {'error': str(e)}))
+    else:
+        conn.send(('done', {'result': {
+            'objective': schedule.p.objective.value(),
+            'sessions': result_to_json(result),
+        }}))
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+
+        if parts == ['jobs']:
+            jobs = [job.to_dict(result=False) for job in self.server.service.all_jobs()]
+            return self._send(200, jobs)
+
+        job = self._job(parts)
+
+        if job is None:
+            return self._send(404, {'error': 'Not found'})
+
+        if len(parts) == 2:
+            return self._send(200, job.to_dict())
+
+        self._stream(job)
+
+    def do_POST(self):
+        if self.path.strip('/') != 'jobs':
+            return self._send(404, {'error': 'Not found'})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = self.server.service.submit(json.loads(self.rfile.read(length)))
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+        except queue.Full:
+            return self._send(503, {'error': 'Too many jobs queued'})
+
+        self._send(202, job.to_dict())
+
+    def do_DELETE(self):
+        parts = self.path.strip('/').split('/')
+        job = self._job(parts)
+
+        if job is None or len(parts) != 2:
+            return self._send(404, {'error': 'Not found'})
+
+        self._send(200, self.server.service.cancel(job.id).to_dict())
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _job(self, parts):
+        if len(parts) in (2, 3) and parts[0] == 'jobs' and parts[2:] in ([], ['events']):
+            return self.server.service.jobs.get(parts[1])
+
+    def _send(self, code, body):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, job):
+        """Write the job as a line of JSON every time it changes, until finished"""
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        while True:
+            version = job.version
+            self.wfile.write(json.dumps(job.to_dict()).encode() + b'\n')
+            self.wfile.flush()
+
+            if job.status in FINISHED:
+                break
+
+            self.server.service.wait(job, version)
+
+
+def make_server(service, host='127.0.0.1', port=8080, verbose=False):
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.service = service
+    server.verbose = verbose
+
+    return server
+
+
+class ServiceClient:
+    """A minimal client for the scheduling service"""
+
+    def __init__(self, url='http://127.0.0.1:8080'):
+        self.url = url.rstrip('/')
+
+    def submit(self, players, sessions, shared_games=[], table_limit=10, time_limit=None):
+        return self._request('POST', '/jobs', {
+            'players': players,
+            'sessions': sessions,
+            'shared_games': shared_games,
+            'table_limit': table_limit,
+            'time_limit': time_limit,
+        })
+
+    def job(self, id):
+        return self._request('GET', f'/jobs/{id}')
+
+    def jobs(self):
+        return self._request('GET', '/jobs')
+
+    def cancel(self, id):
+        return self._request('DELETE', f'/jobs/{id}')
+
+    def events(self, id):
+        """Yields the job's state each time it changes, until it finishes"""
+
+        with urllib.request.urlopen(f'{self.url}/jobs/{id}/events') as response:
+            for line in response:
+                yield json.loads(line)
+
+    def wait(self, id):
+        """Returns the job once it has finished"""
+
+        for job in self.events(id):
+            pass
+
+        return job
+
+    def _request(self, method, path, body=None):
+        data = None if body is None else json.dumps(body).encode()
+        request = urllib.request.Request(
+            self.url + path,
+            data=data,
+            method=method,
+            headers={'Content-Type': 'application/json'},
+        )
+
+        try:
+            with urllib.request.urlopen(request) as response:
+                return json.load(response)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(json.load(e).get('error', str(e))) from e
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Run the scheduler as a local HTTP service')
+    parser.add_argument('--games', metavar='FILE', default='games.json', help='Games database json')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on')
+    parser.add_argument('--port', metavar='N', default=8080, type=int, help='Port to listen on')
+    parser.add_argument('--workers', metavar='N', default=2, type=int, help='Jobs to solve at once')
+    parser.add_argument(
+        '--queue-size', metavar='N', default=16, type=int,
+        help='Jobs that can wait to be solved',
+    )
+    parser.add_argument(
+        '--time-limit', metavar='SECONDS', default=300, type=float,
+        help='Default per-job time limit',
+    )
+    parser.add_argument(
+        '--keep-jobs', metavar='N', default=1000, type=int,
+        help='Finished jobs to keep results for',
+    )
+    parser.add_argument('--verbose', action='store_true', help='Log requests')
+    args = parser.parse_args()
+
+    service = Service(
+        GameDatabase.from_file(args.games),
+        workers=args.workers,
+        queue_size=args.queue_size,
+        default_time_limit=args.time_limit,
+        keep_finished=args.keep_jobs,
+    )
+    service.start()
+    server = make_server(service, args.host, args.port, args.verbose)
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
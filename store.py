@@ -0,0 +1,261 @@
+"""Keep solved schedules in a SQLite database.
+
+Each solve is stored as a run, alongside earlier ones:
+
+    runs      id, created, label, objective
+    sessions  run, session (index), name, length
+    tables    id, run, session, game, start (minutes into the session, for
+              packed schedules)
+    seats     table_id, run, session, player, interested, owner
+
+Seats repeat the run and session of their table so that a player's schedule
+can be found from one index. A schedule is written with one bulk insert into
+each of these, in a single transaction.
+
+    python store.py --db schedule.db runs
+    python store.py --db schedule.db player Bob
+    python store.py --db schedule.db game 1830 --session Saturday
+    python store.py --db schedule.db diff 1 2
+"""
+from argparse import ArgumentParser
+from itertools import groupby
+import sqlite3
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    label TEXT,
+    objective REAL
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    run INTEGER NOT NULL REFERENCES runs (id),
+    session INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    length INTEGER,
+    PRIMARY KEY (run, session)
+);
+CREATE TABLE IF NOT EXISTS tables (
+    id INTEGER PRIMARY KEY,
+    run INTEGER NOT NULL REFERENCES runs (id),
+    session INTEGER NOT NULL,
+    game TEXT NOT NULL,
+    start INTEGER
+);
+CREATE TABLE IF NOT EXISTS seats (
+    table_id INTEGER NOT NULL REFERENCES tables (id),
+    run INTEGER NOT NULL,
+    session INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    interested INTEGER NOT NULL,
+    owner INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS seats_by_player ON seats (run, player, session);
+CREATE INDEX IF NOT EXISTS seats_by_table ON seats (table_id);
+CREATE INDEX IF NOT EXISTS tables_by_game ON tables (run, game, session);
+CREATE INDEX IF NOT EXISTS tables_by_session ON tables (run, session);
+"""
+
+
+class ScheduleStore:
+    def __init__(self, path):
+        self.db = sqlite3.connect(path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def add_run(self, result, sessions, label=None, objective=None):
+        """Store a solved schedule, returning its run id.
+
+        `result` is as returned by Schedule.solve, or PackedSchedule.solve
+        (with a start time for each table).
+
+        """
+        with self.db:
+            run = self.db.execute(
+                "INSERT INTO runs (created, label, objective) VALUES (?, ?, ?)",
+                (time.time(), label, objective),
+            ).lastrowid
+            self.db.executemany(
+                "INSERT INTO sessions (run, session, name, length) VALUES (?, ?, ?, ?)",
+                [
+                    (run, i, session.get('name', str(i)), session.get('length'))
+                    for i, session in enumerate(sessions)
+                ],
+            )
+
+            # Allocate table ids ourselves, so that seats can refer to them
+            # without a round trip per table.
+            next_id = self.db.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tables").fetchone()[0]
+            tables = []
+            seats = []
+
+            for i, session in enumerate(result):
+                for table in session:
+                    start = table[0] if len(table) == 3 else None
+                    game, players = table[-2:]
+                    tables.append((next_id, run, i, game, start))
+                    seats.extend(
+                        (next_id, run, i, p['name'], game in p['interests'], game in p['owns'])
+                        for p in players
+                    )
+                    next_id += 1
+
+            self.db.executemany(
+                "INSERT INTO tables (id, run, session, game, start) VALUES (?, ?, ?, ?, ?)", tables,
+            )
+            self.db.executemany(
+                "INSERT INTO seats (table_id, run, session, player, interested, owner) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                seats,
+            )
+
+        return run
+
+    def runs(self):
+        """Returns (id, created, label, objective) for each run"""
+
+        return self.db.execute(
+            "SELECT id, created, label, objective FROM runs ORDER BY id"
+        ).fetchall()
+
+    def latest_run(self):
+        return self.db.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+
+    def player_schedule(self, player, run=None):
+        """Returns (session name, game, start, [everyone at the table]) for each
+        session the player plays in
+
+        """
+        return self._tables(
+            """
+            FROM seats AS me
+            JOIN tables AS t ON t.id = me.table_id
+            JOIN sessions AS s ON s.run = t.run AND s.session = t.session
+            JOIN seats AS other ON other.table_id = t.id
+            WHERE me.run = ? AND me.player = ?
+            """,
+            [run or self.latest_run(), player],
+        )
+
+    def game_tables(self, game, session=None, run=None):
+        """Returns (session name, game, start, [players]) for each table of a
+        game. `session` may be a session's index or its name.
+
+        """
+        query = """
+            FROM tables AS t
+            JOIN sessions AS s ON s.run = t.run AND s.session = t.session
+            JOIN seats AS other ON other.table_id = t.id
+            WHERE t.run = ? AND t.game = ?
+        """
+        params = [run or self.latest_run(), game]
+
+        if session is not None:
+            query += " AND (s.name = ? OR s.session = ?)"
+            params += [str(session), session]
+
+        return self._tables(query, params)
+
+    def diff(self, a, b):
+        """Returns (player, session name, start, game in a, game in b) wherever
+        a player's game differs between runs a and b (None if not playing).
+        Tables of packed schedules are matched by their start time.
+
+        """
+        return self.db.execute(
+            """
+            WITH
+                seats_a AS (
+                    SELECT seats.player, seats.session, t.start, t.game
+                    FROM seats JOIN tables AS t ON t.id = seats.table_id
+                    WHERE seats.run = :a
+                ),
+                seats_b AS (
+                    SELECT seats.player, seats.session, t.start, t.game
+                    FROM seats JOIN tables AS t ON t.id = seats.table_id
+                    WHERE seats.run = :b
+                ),
+                pairs AS (
+                    SELECT sa.player, sa.session, sa.start, sa.game AS game_a, sb.game AS game_b
+                    FROM seats_a AS sa
+                    LEFT JOIN seats_b AS sb
+                        ON sb.player = sa.player AND sb.session = sa.session
+                        AND sb.start IS sa.start
+                    UNION ALL
+                    SELECT sb.player, sb.session, sb.start, NULL, sb.game
+                    FROM seats_b AS sb
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM seats_a AS sa
+                        WHERE sa.player = sb.player AND sa.session = sb.session
+                        AND sa.start IS sb.start
+                    )
+                )
+            SELECT pairs.player, s.name, pairs.start, game_a, game_b
+            FROM pairs JOIN sessions AS s ON s.run = :b AND s.session = pairs.session
+            WHERE game_a IS NOT game_b
+            ORDER BY pairs.session, pairs.player, pairs.start
+            """,
+            {'a': a, 'b': b},
+        ).fetchall()
+
+    def _tables(self, query, params):
+        """Run a query joining tables `t`, sessions `s` and seats `other`, and
+        collect the players at each table
+
+        """
+        rows = self.db.execute(
+            "SELECT t.id, s.name, t.game, t.start, other.player "
+            + query +
+            " ORDER BY t.session, t.start, t.id, other.player",
+            params,
+        )
+
+        return [
+            (session, game, start, [row[-1] for row in seats])
+            for (_, session, game, start), seats in groupby(rows, key=lambda row: row[:4])
+        ]
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Query schedules stored with schedule.py --db')
+    parser.add_argument('--db', metavar='FILE', default='schedule.db', help='SQLite database')
+    parser.add_argument('--run', metavar='N', type=int, help='Run to query (default: the latest)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('runs', help='List stored runs')
+    subparser = subparsers.add_parser('player', help="A player's schedule")
+    subparser.add_argument('player', help='Player name')
+    subparser = subparsers.add_parser('game', help='Everyone playing a game')
+    subparser.add_argument('game', help='Game name')
+    subparser.add_argument('--session', help='Only this session (name or number)')
+    subparser = subparsers.add_parser('diff', help="Players whose games differ between two runs")
+    subparser.add_argument('a', type=int, metavar='RUN')
+    subparser.add_argument('b', type=int, metavar='RUN')
+    args = parser.parse_args()
+
+    store = ScheduleStore(args.db)
+
+    if args.command == 'runs':
+        for run, created, label, objective in store.runs():
+            when = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))
+            print(f"{run}\t{when}\t{objective}\t{label or ''}")
+    elif args.command == 'player':
+        for session, game, start, players in store.player_schedule(args.player, args.run):
+            at = '' if start is None else f" (+{start} minutes)"
+            others = [p for p in players if p != args.player]
+            print(f"{session}: {game}{at}" + (f" with {', '.join(others)}" if others else ''))
+    elif args.command == 'game':
+        session = int(args.session) if args.session and args.session.isdigit() else args.session
+
+        for name, _, start, players in store.game_tables(args.game, session, args.run):
+            at = '' if start is None else f" (+{start} minutes)"
+            print(f"{name}{at}: {', '.join(players)}")
+    else:
+        for player, session, start, game_a, game_b in store.diff(args.a, args.b):
+            at = '' if start is None else f" (+{start} minutes)"
+            print(f"{session}{at}: {player}: {game_a or '-'} -> {game_b or '-'}")
+
+    store.close()
@@ -0,0 +1,336 @@
+"""Write the scheduling model straight to disk, a row at a time.
+
+For very large inputs, building the model in PuLP keeps every variable,
+expression and named constraint in memory, and PuLP then writes all of it out
+again for CBC. Here the same model as `Schedule` builds is generated as a
+stream of rows which are written directly to an LP format file, with columns
+named by integer index (`x0`, `x1`, ...) rather than `X_i_j_k`. Peak memory
+is one row plus the index tables that `Schedule` computes anyway.
+
+(MPS files are laid out column by column, so cannot be written from a stream
+of rows without holding the whole matrix; CBC reads LP files just as well.)
+
+Only the basic model is supported - not the elastic, staged or packed
+variants.
+"""
+import os
+import subprocess
+import tempfile
+
+import pulp
+
+from schedule import InfeasibleError
+
+
+# Terms per line in the LP file, to keep lines short.
+TERMS_PER_LINE = 8
+
+
+class ColumnIndex:
+    """Maps each X_i_p_g and G_i_g_c variable of a Schedule to an integer.
+
+    X columns come first: session by session, player by player, game by game.
+    Then G columns, session by session, game by game, count by count.
+
+    """
+    def __init__(self, schedule):
+        self.schedule = schedule
+        self.x_base = []
+        self.player_pos = []
+        self.game_pos = []
+        self.g_base = []
+        self.g_counts = []
+
+        n = 0
+        for i in schedule.session_ids:
+            self.x_base.append(n)
+            self.player_pos.append({p: x for x, p in enumerate(schedule.session_players[i])})
+            self.game_pos.append({g: x for x, g in enumerate(schedule.session_games[i])})
+            n += len(schedule.session_players[i]) * len(schedule.session_games[i])
+
+        self.x_count = n
+
+        for i, session in enumerate(schedule.sessions):
+            bases = {}
+            counts = {}
+
+            for g in schedule.session_games[i]:
+                game = schedule.all_games[g]
+                bases[g] = n
+                counts[g] = (
+                    schedule.games_db.max_players(game, session) -
+                    schedule.games_db.min_players(game) + 1
+                )
+                n += counts[g]
+
+            self.g_base.append(bases)
+            self.g_counts.append(counts)
+
+        self.count = n
+
+    def x(self, i, p, g):
+        return self.x_base[i] + self.player_pos[i][p] * len(self.game_pos[i]) + self.game_pos[i][g]
+
+    def g(self, i, g, c):
+        return self.g_base[i][g] + c
+
+    def has_x(self, i, p, g):
+        return p in self.player_pos[i] and g in self.game_pos[i]
+
+    def decode_x(self, col):
+        """Returns (session, player, game) for an X column"""
+
+        for i in reversed(self.schedule.session_ids):
+            if col >= self.x_base[i] and self.game_pos[i]:
+                offset = col - self.x_base[i]
+                width = len(self.game_pos[i])
+                return (
+                    i,
+                    self.schedule.session_players[i][offset // width],
+                    self.schedule.session_games[i][offset % width],
+                )
+
+
+def objective_terms(schedule, index):
+    """Yields (column, coefficient) for the objective function"""
+
+    for i in schedule.session_ids:
+        for p in schedule.session_players[i]:
+            for k in schedule.session_games[i]:
+                weight = schedule.roster[p].weight(schedule.all_games[k])
+
+                if weight:
+                    yield index.x(i, p, k), weight
+
+        for g in schedule.session_games[i]:
+            game = schedule.all_games[g]
+
+            for c in range(index.g_counts[i][g]):
+                popularity = schedule.games_db.adjusted_popularity(game, c)
+
+                if popularity:
+                    yield index.g(i, g, c), popularity
+
+
+def rows(schedule, index):
+    """Yields every constraint as (terms, sense, rhs).
+
+    `terms` is a list of (column, coefficient), and sense one of '=', '<='
+    or '>='. These mirror the constraints `Schedule` adds to its model.
+
+    """
+    yield from logical_play_rows(schedule, index)
+    yield from player_count_rows(schedule, index)
+    yield from uniqueness_rows(schedule, index)
+
+    if schedule.symmetry_breaking:
+        yield from symmetry_breaking_rows(schedule, index)
+
+
+def logical_play_rows(schedule, index):
+    """See Schedule._add_logical_play_constraints"""
+
+    for i in schedule.session_ids:
+        for p in schedule.session_players[i]:
+            yield [(index.x(i, p, k), 1) for k in schedule.session_games[i]], '=', 1
+
+        for g in schedule.session_games[i]:
+            for c in range(index.g_counts[i][g] - 1):
+                yield [(index.g(i, g, c), 1), (index.g(i, g, c + 1), -1)], '>=', 0
+
+        yield [(index.g(i, g, 0), 1) for g in schedule.session_games[i]], '<=', schedule.table_limit
+
+
+def player_count_rows(schedule, index):
+    """See Schedule._add_player_count_constraints"""
+
+    for i in schedule.session_ids:
+        for g in schedule.session_games[i]:
+            game = schedule.all_games[g]
+            terms = [(index.x(i, p, g), 1) for p in schedule.session_players[i]]
+            terms.append((index.g(i, g, 0), -schedule.games_db.min_players(game)))
+            terms.extend((index.g(i, g, c), -1) for c in range(1, index.g_counts[i][g]))
+
+            yield terms, '=', 0
+
+
+def uniqueness_rows(schedule, index):
+    """See Schedule._add_uniqueness_constraints"""
+
+    copies_of = {}
+    for copy in schedule.copies:
+        copies_of.setdefault(copy.game, []).append(copy.id)
+
+    for p, _ in enumerate(schedule.roster):
+        for game, copies in copies_of.items():
+            terms = [
+                (index.x(i, p, g), 1)
+                for g in copies
+                for i in schedule.session_ids
+                if index.has_x(i, p, g)
+            ]
+
+            if len(terms) > 1:
+                yield terms, '<=', 1
+
+
+def symmetry_breaking_rows(schedule, index):
+    """See Schedule._add_symmetry_breaking_constraints"""
+
+    for i in schedule.session_ids:
+        previous = {}
+
+        for g in schedule.session_games[i]:
+            game = schedule.all_games[g]
+
+            if game in previous:
+                yield [(index.g(i, previous[game], 0), 1), (index.g(i, g, 0), -1)], '>=', 0
+
+            previous[game] = g
+
+
+def write_lp(schedule, f):
+    """Write the model for a Schedule (built with build_model=False) to f.
+
+    Returns the ColumnIndex needed to read the solution.
+
+    """
+    index = ColumnIndex(schedule)
+
+    f.write("\\ Schedule\nMaximize\n obj:")
+    _write_terms(f, objective_terms(schedule, index), empty=' 0 x0')
+
+    f.write("Subject To\n")
+    for n, (terms, sense, rhs) in enumerate(rows(schedule, index)):
+        # e.g. the table limit in a session without games
+        if not terms:
+            continue
+
+        f.write(f" r{n}:")
+        _write_terms(f, terms, end=f" {sense} {rhs}\n")
+
+    f.write("Binaries\n")
+    for start in range(0, index.count, TERMS_PER_LINE):
+        end = min(start + TERMS_PER_LINE, index.count)
+        f.write(' ' + ' '.join(f'x{c}' for c in range(start, end)) + '\n')
+
+    f.write("End\n")
+
+    return index
+
+
+def _write_terms(f, terms, end='\n', empty=''):
+    written = 0
+
+    for col, coef in terms:
+        sign = '-' if coef < 0 else '+'
+        f.write(f" {sign} {abs(coef):.12g} x{col}")
+        written += 1
+
+        if written % TERMS_PER_LINE == 0:
+            f.write("\n")
+
+    if not written:
+        f.write(empty)
+
+    f.write(end)
+
+
+def solve(schedule, time_limit=None, msg=False, keep=None, threads=None):
+    """Solve a Schedule (built with build_model=False) via a streamed LP file.
+
+    Returns the result in the same format as Schedule.solve, and the
+    objective value. If `keep` is a path, the LP file is written there and
+    kept.
+
+    """
+    directory = tempfile.mkdtemp()
+    lp_path = keep or os.path.join(directory, 'schedule.lp')
+
+    try:
+        with open(lp_path, 'w') as f:
+            index = write_lp(schedule, f)
+
+        status, values = solve_lp_file(lp_path, time_limit, msg, threads)
+
+        return read_result(schedule, index, status, values)
+    finally:
+        if not keep:
+            os.remove(lp_path)
+
+        os.rmdir(directory)
+
+
+def solve_lp_file(lp_path, time_limit=None, msg=False, threads=None):
+    """Run CBC on an LP file.
+
+    Returns CBC's status line, and the value of every non-zero column by
+    column number. This needs nothing but the file, so can run elsewhere -
+    see `distributed`.
+
+    """
+    directory = tempfile.mkdtemp()
+    sol_path = os.path.join(directory, 'schedule.sol')
+    command = [pulp.PULP_CBC_CMD().path, lp_path]
+
+    if time_limit is not None:
+        command += ['-sec', str(time_limit)]
+
+    if threads is not None:
+        command += ['-threads', str(threads)]
+
+    command += ['-solve', '-solution', sol_path]
+
+    try:
+        subprocess.run(
+            command,
+            check=True,
+            stdout=None if msg else subprocess.DEVNULL,
+            stderr=None if msg else subprocess.DEVNULL,
+        )
+
+        with open(sol_path) as f:
+            status = f.readline().strip()
+            values = {}
+
+            for line in f:
+                _, name, value, _ = line.split()[-4:]
+
+                if float(value):
+                    values[int(name[1:])] = float(value)
+
+        return status, values
+    finally:
+        if os.path.exists(sol_path):
+            os.remove(sol_path)
+
+        os.rmdir(directory)
+
+
+def read_result(schedule, index, status, values):
+    """Returns the result and objective from the output of `solve_lp_file`.
+
+    If CBC ran out of time, this is the best schedule it had found.
+
+    """
+    if 'infeasible' in status.lower():
+        raise InfeasibleError("Problem not solvable", schedule.diagnose())
+
+    stopped = status.startswith('Stopped on time') and 'no integer solution' not in status
+
+    if not (status.startswith('Optimal') or stopped):
+        raise RuntimeError("Problem not solvable")
+
+    objective = float(status.rsplit(' ', 1)[1])
+    result = [[] for _ in schedule.session_ids]
+    tables = {}
+
+    for col, value in values.items():
+        if col < index.x_count and value > 0.5:
+            i, p, g = index.decode_x(col)
+            tables.setdefault((i, g), []).append(p)
+
+    for (i, g), players in tables.items():
+        result[i].append((schedule.all_games[g], [schedule.players[p] for p in sorted(players)]))
+
+    return [sorted(r, key=lambda x: x[0]) for r in result], objective
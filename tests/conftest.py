@@ -0,0 +1,46 @@
+import pytest
+
+from schedule import GameDatabase
+
+
+@pytest.fixture
+def games():
+    return GameDatabase({
+        '1817': {
+            'name': '1817',
+            'min_players': 3,
+            'max_players': 6,
+            'min_playtime': 360,
+            'max_playtime': 540,
+            'popularity': {
+                '3': 0.5,
+                '4': 1.0,
+                '5': 1.0,
+                '6': 1.0,
+            }
+        },
+        '1830': {
+            'name': '1830',
+            'min_players': 3,
+            'max_players': 6,
+            'min_playtime': 180,
+            'max_playtime': 360,
+            'popularity': {
+                '3': 1.0,
+                '4': 1.0,
+                '5': 1.0,
+                '6': 1.0,
+            }
+        },
+        '1860': {
+            'name': '1860',
+            'min_players': 3,
+            'max_players': 4,
+            'min_playtime': 240,
+            'max_playtime': 240,
+            'popularity': {
+                '3': 1.0,
+                '4': 0.5,
+            }
+        },
+    })
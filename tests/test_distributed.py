@@ -0,0 +1,125 @@
+import json
+import multiprocessing
+import threading
+import time
+
+import pytest
+
+from distributed import Broker, BrokerServer, Connection, Coordinator, Worker, lp_job
+from schedule import InfeasibleError, Schedule
+
+
+def session(**kwargs):
+    return {'length': 600, **kwargs}
+
+
+def players():
+    return [
+        {'name': n, 'owns': [], 'interests': ['1830']} for n in 'ABCD'
+    ] + [
+        {'name': 'E', 'owns': ['1830', '1860'], 'interests': ['1860']},
+    ]
+
+
+@pytest.fixture
+def broker():
+    server = BrokerServer(Broker(lease_timeout=0.5), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server.server_address
+    server.shutdown()
+    server.server_close()
+
+
+def run_worker(address, name):
+    Worker(address, name, heartbeat=0.1).run(max_jobs=1)
+
+
+def test_workers_solve_schedules_and_models(broker, games):
+    coordinator = Coordinator(broker)
+    schedule_id = coordinator.submit_schedule(games, players(), [session()], ['1830'])
+    model = Schedule(games, players(), [session()], ['1830'], build_model=False)
+    model_id = coordinator.submit_model(model)
+
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(broker, f'w{n}')) for n in range(2)
+    ]
+    for w in workers:
+        w.start()
+
+    result = coordinator.result(schedule_id, timeout=60)
+    model_result, objective = coordinator.result(model_id, timeout=60)
+
+    for w in workers:
+        w.join(10)
+
+    assert result['objective'] == pytest.approx(objective)
+    assert [t['game'] for t in result['sessions'][0]] == [game for game, _ in model_result[0]]
+
+    stats = coordinator.stats()
+    assert stats['jobs'] == {'done': 2}
+    assert sum(w['jobs'] for w in stats['workers'].values()) == 2
+    coordinator.close()
+
+
+def test_lost_jobs_are_retried(broker, games):
+    coordinator = Coordinator(broker)
+    id = coordinator.submit_schedule(games, players(), [session()], ['1830'])
+
+    # A worker that takes the job, then never heartbeats or answers
+    lost = Connection(broker)
+    assert lost.call('pull', worker='lost')['id'] == id
+    time.sleep(0.6)
+
+    Worker(broker, 'good', heartbeat=0.1).run(max_jobs=1)
+    job = coordinator.status(id)
+
+    assert job['status'] == 'done'
+    assert job['attempts'] == 2
+    assert job['worker'] == 'good'
+    lost.close()
+    coordinator.close()
+
+
+def test_identical_jobs_are_answered_from_the_cache(broker, games):
+    coordinator = Coordinator(broker)
+    first = coordinator.submit_schedule(games, players(), [session()], ['1830'])
+    Worker(broker, 'w', heartbeat=0.1).run(max_jobs=1)
+    second = coordinator.submit_schedule(games, players(), [session()], ['1830'])
+
+    assert coordinator.status(second)['cached']
+    assert coordinator.result(second) == coordinator.result(first)
+    coordinator.close()
+
+
+def test_infeasible_jobs_fail_with_reasons(broker, games):
+    coordinator = Coordinator(broker)
+    id = coordinator.submit_schedule(games, players()[:2], [session()])
+    Worker(broker, 'w', heartbeat=0.1).run(max_jobs=1)
+
+    with pytest.raises(InfeasibleError, match='no game fits'):
+        coordinator.result(id)
+
+    coordinator.close()
+
+
+def test_broker_gives_up_after_max_attempts():
+    b = Broker(lease_timeout=0, max_attempts=2)
+    id = b.submit(lp_job('x'))
+
+    assert b.pull('a')['id'] == id
+    assert b.pull('b')['id'] == id
+    assert b.pull('c') is None
+    assert b.status(id)['status'] == 'failed'
+
+
+def test_bad_requests_are_answered_with_an_error(broker):
+    connection = Connection(broker)
+
+    for line in (b'not json\n', b'[]\n', b'{"id": "1"}\n', b'{"op": "shutdown"}\n'):
+        connection.file.write(line)
+        connection.file.flush()
+        assert json.loads(connection.file.readline())['ok'] is False
+
+    assert connection.call('stats')['jobs'] == {}
+    connection.close()
@@ -0,0 +1,56 @@
+from domain import Player, Session, Table, make_copies
+
+
+def test_player_json_round_trip():
+    player = Player.from_json(
+        3,
+        {'name': 'Bob', 'owns': ['1830'], 'interests': ['1830', '1817']},
+        default_sessions=range(2),
+    )
+
+    assert player.id == 3
+    assert player.sessions == {0, 1}
+    assert player.to_json() == {
+        'name': 'Bob',
+        'owns': ['1830'],
+        'interests': ['1817', '1830'],
+        'sessions': [0, 1],
+    }
+
+
+def test_player_weight_prefers_owned_interests():
+    player = Player(0, 'Bob', owns=['1830'], interests=['1830', '1817'])
+
+    assert player.weight('1830') == 1.05
+    assert player.weight('1817') == 1.0
+    assert player.weight('1860') == 0.0
+
+
+def test_session_name_defaults_to_index():
+    assert Session.from_json(2, {'length': 240}).name == '2'
+
+
+def test_copies_are_shared_then_owned_in_player_order():
+    copies = make_copies(['1817'], [
+        {'name': 'Alice', 'owns': ['1830', '1860']},
+        {'name': 'Bob', 'owns': ['1830']},
+    ])
+
+    assert [(c.id, c.game, c.owner) for c in copies] == [
+        (0, '1817', None), (1, '1830', 0), (2, '1860', 0), (3, '1830', 1),
+    ]
+
+
+def test_table_to_json_uses_names():
+    copies = make_copies(['1817'], [])
+    roster = [Player(0, 'Alice'), Player(1, 'Bob')]
+
+    assert Table(0, 0, [1, 0]).to_json(copies, roster) == {
+        'session': 0, 'game': '1817', 'players': ['Bob', 'Alice'],
+    }
+
+
+def test_players_use_slots():
+    player = Player(0, 'Alice')
+
+    assert not hasattr(player, '__dict__')
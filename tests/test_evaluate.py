@@ -0,0 +1,118 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from evaluate import Evaluator
+from schedule import GameDatabase, Schedule
+
+
+SAMPLE = Path(__file__).parent.parent / 'sample'
+
+
+@pytest.fixture(scope='module')
+def sample():
+    with open(SAMPLE / 'players.json') as f:
+        players = json.load(f)
+
+    with open(SAMPLE / 'sessions.json') as f:
+        sessions = json.load(f)
+
+    games = GameDatabase({})
+    s = Schedule(games, players, sessions)
+    result = s.solve()
+
+    return games, players, sessions, result, s.p.objective.value()
+
+
+def names(result):
+    return [[(g, [p['name'] for p in ps]) for g, ps in tables] for tables in result]
+
+
+def test_score_matches_solver_objective(sample):
+    games, players, sessions, result, objective = sample
+
+    e = Evaluator(games, players, sessions, result)
+
+    assert e.score == pytest.approx(objective)
+    assert e.violations == {}
+
+
+def test_move_delta_matches_rescoring(sample):
+    games, players, sessions, result, _ = sample
+    e = Evaluator(games, players, sessions, result)
+    tables = names(result)
+    name = tables[0][0][1][0]
+
+    delta, violations = e.try_move(name, 0, 0, 1)
+
+    tables[0][0][1].remove(name)
+    tables[0][1][1].append(name)
+    moved = Evaluator(games, players, sessions, tables)
+
+    assert delta == pytest.approx(moved.score - e.score)
+    assert sorted(violations) == sorted(moved.violations.values())
+
+
+def test_try_move_leaves_the_schedule_unchanged(sample):
+    games, players, sessions, result, objective = sample
+    e = Evaluator(games, players, sessions, result)
+    a = result[1][0][1][0]['name']
+    b = result[1][1][1][0]['name']
+
+    e.try_swap(1, a, 0, b, 1)
+
+    assert e.score == pytest.approx(objective)
+    assert e.violations == {}
+
+
+def test_violations_are_reported(games):
+    players = [
+        {'name': 'Alice', 'owns': ['1817'], 'interests': ['1817'], 'sessions': [0]},
+        {'name': 'Bob', 'owns': [], 'interests': ['1817']},
+        {'name': 'Charles', 'owns': [], 'interests': ['1817']},
+        {'name': 'Dick', 'owns': [], 'interests': []},
+    ]
+    sessions = [{'length': 600}, {'length': 600}]
+    result = [
+        [('1817', ['Alice', 'Bob', 'Charles', 'Dick'])],
+        [('1817', ['Bob', 'Charles']), ('1830', ['Alice'])],
+    ]
+
+    e = Evaluator(games, players, sessions, result, table_limit=1)
+
+    assert sorted(e.violations.values()) == [
+        "Bob plays 1817 2 times",
+        "Charles plays 1817 2 times",
+        "Session 1 table 0: 1817 has 2 players, needs 3-6",
+        "Session 1 table 1: 1830 has 1 players, needs 3-6",
+        "Session 1: 1 tables of 1817, 0 copies",
+        "Session 1: 1 tables of 1830, 0 copies",
+        "Session 1: 2 tables, limit is 1",
+        "Session 1: Alice is not attending",
+        "Session 1: Dick is at 0 tables",
+    ]
+
+
+def test_impossible_edits_leave_the_schedule_unchanged(sample):
+    games, players, sessions, result, objective = sample
+    e = Evaluator(games, players, sessions, result)
+    a = result[0][0][1][0]['name']
+    b = result[0][1][1][0]['name']
+
+    with pytest.raises(ValueError, match='No table 99'):
+        e.try_move(a, 0, 0, 99)
+
+    with pytest.raises(ValueError, match='is not at table 0'):
+        e.try_swap(0, a, 0, b, 0)
+
+    assert e.score == pytest.approx(objective)
+    assert e.violations == {}
+    assert a in e.tables[0][0][1]
+
+
+def test_unknown_players_are_an_error(games):
+    players = [{'name': 'Alice', 'owns': [], 'interests': []}]
+
+    with pytest.raises(ValueError, match="unknown player 'Bob'"):
+        Evaluator(games, players, [{'length': 600}], [[('1817', ['Alice', 'Bob'])]])
@@ -0,0 +1,54 @@
+import json
+
+import numpy as np
+
+from generate_sample import bulk_jsonl, make_games_distribution
+
+
+def games_db():
+    return [{'name': f'18{i:02d}', 'owned': 100 - i} for i in range(20)]
+
+
+def people(n, n_sessions=4, chunk_size=7):
+    games = games_db()
+    chunks = list(bulk_jsonl(
+        n,
+        games,
+        make_games_distribution(games),
+        n_sessions,
+        np.random.default_rng(1),
+        chunk_size=chunk_size,
+        pool=(['Alice', 'Bob', 'Zoë'], ['Smith', 'Jones']),
+    ))
+
+    return chunks, [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+
+
+def test_bulk_people_are_written_in_chunks_with_unique_names():
+    chunks, ps = people(20)
+
+    assert [chunk.count('\n') for chunk in chunks] == [7, 7, 6]
+    assert len({p['name'] for p in ps}) == 20
+    assert ps[0]['name'] == 'Alice Smith'
+    assert ps[6]['name'] == 'Alice Smith 2'
+
+
+def test_bulk_people_are_plausible():
+    _, ps = people(500)
+    titles = {g['name'] for g in games_db()}
+
+    for p in ps:
+        assert len(p['owns']) <= 5
+        assert p['owns'] == p['interests'][:len(p['owns'])]
+        assert len(set(p['interests'])) == len(p['interests'])
+        assert set(p['interests']) <= titles
+        assert p['sessions'] == list(range(p['sessions'][0], p['sessions'][-1] + 1))
+        assert 0 <= p['sessions'][0] and p['sessions'][-1] < 4
+
+    assert 0.6 < sum(len(p['sessions']) == 4 for p in ps) / len(ps) < 0.8
+
+
+def test_single_session_events():
+    _, ps = people(10, n_sessions=1)
+
+    assert all(p['sessions'] == [0] for p in ps)
@@ -0,0 +1,91 @@
+import pytest
+
+from packing import PackedSchedule, make_slots
+from schedule import GameDatabase
+
+
+def session(**kwargs):
+    return {'name': 'Sat', 'length': 480, **kwargs}
+
+
+def short_and_long_games():
+    return GameDatabase({
+        'Short': {
+            'name': 'Short', 'min_players': 3, 'max_players': 4,
+            'min_playtime': 120, 'max_playtime': 120,
+        },
+        'Long': {
+            'name': 'Long', 'min_players': 3, 'max_players': 4,
+            'min_playtime': 360, 'max_playtime': 360,
+        },
+    })
+
+
+def test_slots_only_where_games_can_tile_the_session():
+    slots = make_slots([session()], short_and_long_games(), {'Short', 'Long'}, 120)
+
+    assert [(s['start'], s['length']) for s in slots] == [
+        (0, 120), (120, 120), (240, 120), (360, 120),
+        (0, 360), (120, 360),
+        (0, 480),
+    ]
+
+
+def test_coarse_granularity_merges_slots():
+    slots = make_slots([session()], short_and_long_games(), {'Short', 'Long'}, 240)
+
+    assert [(s['start'], s['length']) for s in slots] == [(0, 240), (240, 240), (0, 480)]
+
+
+def test_players_play_back_to_back_games_in_a_long_session():
+    games = short_and_long_games()
+    players = [
+        {'name': 'Alice', 'owns': ['Short'], 'interests': ['Short', 'Long']},
+        {'name': 'Bob', 'owns': ['Long'], 'interests': ['Short', 'Long']},
+        {'name': 'Charles', 'owns': [], 'interests': ['Short', 'Long']},
+    ]
+
+    result = PackedSchedule(games, players, [session()], granularity=120).solve()
+
+    assert [(start, game) for start, game, _ in result[0]] in (
+        [(0, 'Long'), (360, 'Short')],
+        [(0, 'Short'), (120, 'Long')],
+    )
+    assert all(len(ps) == 3 for _, _, ps in result[0])
+
+
+def test_a_copy_is_only_on_one_table_at_a_time():
+    games = short_and_long_games()
+    players = [
+        {'name': n, 'owns': [], 'interests': ['Short']} for n in 'ABCDEF'
+    ]
+    players[0]['owns'] = ['Short']
+    players[1]['owns'] = ['Long']
+    players[2]['owns'] = ['Long']
+
+    result = PackedSchedule(games, players, [session()], granularity=120).solve()
+    short = sorted(start for start, game, _ in result[0] if game == 'Short')
+
+    assert len(short) == 2
+    assert short[1] - short[0] >= 120
+
+
+def test_fairness_counts_sessions_not_slots():
+    games = GameDatabase({
+        name: {
+            'name': name, 'min_players': 3, 'max_players': 4,
+            'min_playtime': length, 'max_playtime': length,
+        }
+        for name, length in (('Short', 120), ('Medium', 240), ('Long', 360))
+    })
+    players = [
+        {'name': n, 'owns': [g], 'interests': ['Short', 'Medium', 'Long']}
+        for n, g in zip('ABC', ('Short', 'Medium', 'Long'))
+    ]
+
+    s = PackedSchedule(games, players, [session(length=360)], granularity=120)
+    s.solve_staged(['fairness'])
+
+    # Playing the long game serves a player's one session as well as two
+    # shorter games would.
+    assert s.stage_values['fairness'] == pytest.approx(1)
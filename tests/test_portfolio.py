@@ -0,0 +1,56 @@
+import os
+
+from portfolio import SolverConfig, solve_portfolio
+from schedule import Schedule
+
+
+def session(**kwargs):
+    return {'length': 600, **kwargs}
+
+
+def players():
+    return [
+        {'name': 'Alice', 'owns': ['1817'], 'interests': ['1817'], 'sessions': [0, 1]},
+        {'name': 'Bob', 'owns': [], 'interests': ['1817'], 'sessions': [0]},
+        {'name': 'Charles', 'owns': [], 'interests': ['1817'], 'sessions': [1]},
+        {'name': 'Dick', 'owns': [], 'interests': ['1817'], 'sessions': [1]},
+        {'name': 'Eric', 'owns': ['1830'], 'interests': [], 'sessions': [0]},
+        {'name': 'Fred', 'owns': [], 'interests': [], 'sessions': [0]},
+    ]
+
+
+def test_portfolio_gives_same_result_as_single_solve(games):
+    expected = Schedule(games, players(), [session(), session()]).solve()
+
+    result = Schedule(games, players(), [session(), session()]).solve(portfolio=[
+        SolverConfig(seed=1),
+        SolverConfig(seed=2, cuts=False, symmetry_breaking=True),
+    ])
+
+    assert result == expected
+
+
+def test_portfolio_stops_once_optimality_is_proven(games):
+    expected = Schedule(games, players(), [session(), session()])
+    expected.solve()
+    s = Schedule(games, players(), [session(), session()])
+    configs = [SolverConfig(seed=1), SolverConfig(seed=2), SolverConfig(seed=3)]
+
+    winner = solve_portfolio(s, configs, processes=1)
+
+    assert winner is configs[0]
+    assert s.p.sol_status == 1
+    assert s.p.objective.value() == expected.p.objective.value()
+
+
+class DyingConfig(SolverConfig):
+    def build(self, time_limit=None):
+        os._exit(1)
+
+
+def test_portfolio_survives_a_configuration_dying_without_reporting(games):
+    s = Schedule(games, players(), [session(), session()])
+    configs = [DyingConfig(), SolverConfig(seed=1)]
+
+    assert solve_portfolio(s, configs, processes=1) is configs[1]
+    assert s.p.sol_status == 1
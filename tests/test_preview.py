@@ -0,0 +1,88 @@
+import random
+
+import pytest
+
+from evaluate import Evaluator
+from preview import Preview
+from schedule import Schedule
+
+
+def session(**kwargs):
+    return {'length': 600, **kwargs}
+
+
+def players():
+    return [
+        {'name': 'Alice', 'owns': ['1817'], 'interests': ['1817']},
+        {'name': 'Bob', 'owns': ['1830'], 'interests': ['1817', '1830']},
+        {'name': 'Charles', 'owns': ['1860'], 'interests': ['1830']},
+        {'name': 'Dick', 'owns': [], 'interests': ['1817', '1860']},
+        {'name': 'Eric', 'owns': [], 'interests': ['1830']},
+        {'name': 'Fred', 'owns': [], 'interests': ['1860']},
+        {'name': 'Georgie', 'owns': [], 'interests': ['1817', '1830']},
+    ]
+
+
+def test_preview_is_a_valid_schedule(games):
+    sessions = [session(), session(length=240), session()]
+
+    for seed in range(10):
+        preview = Preview(Schedule(games, players(), sessions, table_limit=2), seed=seed)
+        result = preview.solve()
+        played = {p['name']: [] for p in players()}
+
+        for i, tables in enumerate(result):
+            assert len(tables) <= 2
+            assert sorted(p['name'] for _, ps in tables for p in ps) == sorted(played)
+
+            for game, ps in tables:
+                assert games.min_players(game) <= len(ps)
+                assert len(ps) <= games.max_players(game, sessions[i])
+
+                for p in ps:
+                    played[p['name']].append(game)
+
+        assert all(len(set(gs)) == len(gs) for gs in played.values())
+
+
+def test_preview_objective_is_bounded_by_lp_relaxation(games):
+    preview = Preview(Schedule(games, players(), [session(), session()]), seed=1)
+    preview.solve()
+    optimal = Schedule(games, players(), [session(), session()])
+    optimal.solve()
+
+    assert preview.objective <= optimal.p.objective.value() + 1e-6
+    assert optimal.p.objective.value() <= preview.lp_bound + 1e-6
+
+
+def random_event(seed):
+    r = random.Random(seed)
+    titles = ['1817', '1830', '1860', '1846', '1889']
+    players = [
+        {
+            'name': f'P{i}',
+            'owns': r.sample(titles, r.choice([0, 0, 1, 1, 2])),
+            'interests': r.sample(titles, r.randint(0, 3)),
+        }
+        for i in range(r.randint(5, 16))
+    ]
+    sessions = [session(length=r.choice([240, 360, 600])) for _ in range(r.randint(1, 3))]
+
+    return players, sessions, r.randint(1, 4)
+
+
+# Seeds for which the full model can schedule random_event
+FEASIBLE_SEEDS = [
+    1, 3, 4, 7, 10, 12, 14, 15, 16, 17, 18, 21, 22, 23, 26, 27, 30, 32, 33, 34, 36, 39,
+]
+
+
+def test_preview_of_feasible_events_is_valid(games):
+    for seed in FEASIBLE_SEEDS:
+        people, sessions, table_limit = random_event(seed)
+        preview = Preview(Schedule(games, people, sessions, table_limit=table_limit), seed=seed)
+        result = preview.solve()
+        e = Evaluator(games, people, sessions, result, table_limit=table_limit)
+
+        assert e.violations == {}
+        assert e.score == pytest.approx(preview.objective)
@@ -0,0 +1,92 @@
+import io
+import json
+
+from registrations import Registrations
+
+
+def sessions():
+    return [{'length': 600}, {'length': 600}]
+
+
+def jsonl(*records):
+    return io.StringIO(''.join(
+        r if isinstance(r, str) else json.dumps(r) + '\n' for r in records
+    ))
+
+
+def test_valid_records_become_players_and_session_attendance(games):
+    r = Registrations(games, sessions())
+    r.read_jsonl(jsonl(
+        {'name': 'Alice', 'owns': ['1817'], 'interests': ['1817'], 'sessions': [1]},
+        {'name': 'Bob', 'interests': ['1830']},
+    ))
+
+    assert r.errors == []
+    assert r.players == [
+        {'name': 'Alice', 'owns': ['1817'], 'interests': ['1817'], 'sessions': [1]},
+        {'name': 'Bob', 'owns': [], 'interests': ['1830'], 'sessions': [0, 1]},
+    ]
+    assert r.session_players == [{1}, {0, 1}]
+
+
+def test_bad_records_are_reported_with_line_numbers(games):
+    r = Registrations(games, sessions())
+    r.read_jsonl(jsonl(
+        {'name': 'Alice'},
+        '{"name": \n',
+        '\n',
+        {'owns': []},
+        {'name': 'Bob', 'interests': '1830'},
+        {'name': 'Charles', 'sessions': [2]},
+    ))
+
+    assert [p['name'] for p in r.players] == ['Alice']
+    assert [(line, message.split(':')[0]) for line, message in r.errors] == [
+        (2, 'Invalid JSON'),
+        (4, 'Missing name'),
+        (5, 'interests must be a list of game names'),
+        (6, 'No such sessions'),
+    ]
+
+
+def test_later_duplicates_replace_earlier_registrations(games):
+    r = Registrations(games, sessions())
+    r.read_jsonl(jsonl(
+        {'name': 'Alice', 'interests': ['1817'], 'sessions': [0]},
+        {'name': 'Bob', 'interests': ['1830']},
+        {'name': 'Alice', 'interests': ['1860'], 'sessions': [1]},
+    ))
+
+    assert [(p['name'], p['interests']) for p in r.players] == [
+        ('Alice', ['1860']), ('Bob', ['1830']),
+    ]
+    assert r.session_players == [{1}, {0, 1}]
+    assert r.warnings == [(3, 'Duplicate registration for Alice, replacing')]
+
+
+def test_unknown_games_are_warned_about_once(games):
+    r = Registrations(games, sessions())
+    r.read_jsonl(jsonl(
+        {'name': 'Alice', 'owns': ['18Prototype'], 'interests': ['18Prototype']},
+        {'name': 'Bob', 'interests': ['18Prototype']},
+    ))
+
+    assert r.warnings == [(1, "Unknown game '18Prototype'")]
+    assert r.players[0]['interests'][0] is r.players[1]['interests'][0]
+
+
+def test_csv_registrations_can_be_scheduled(games):
+    r = Registrations(games, sessions())
+    r.read_csv(io.StringIO(
+        'name,owns,interests,sessions\n'
+        'Alice,1817,1817;1830,\n'
+        'Bob,1830,1817,0;1\n'
+        'Charles,,1830,0;x\n'
+        'Dick,,1830;1817,\n'
+    ))
+
+    assert r.errors == [(4, 'Invalid sessions: 0;x')]
+
+    result = r.schedule().solve()
+
+    assert {game for tables in result for game, _ in tables} == {'1817', '1830'}
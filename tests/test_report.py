@@ -0,0 +1,100 @@
+import csv
+import io
+import json
+import time
+
+import pytest
+
+from report import Report
+from schedule import satisfied_interests
+
+
+SESSIONS = [{'name': 'Friday', 'length': 600}, {'name': 'Saturday', 'length': 600}]
+
+
+def player(name, owns=(), interests=()):
+    return {'name': name, 'owns': list(owns), 'interests': list(interests)}
+
+
+ALICE = player('Alice', ['1830'], ['1830', '1860'])
+BOB = player('Bob', interests=['1830', '1817'])
+CHARLES = player('Charles', interests=['1860'])
+DICK = player('Dick', ['1860'], ['1830', 'Brass'])
+PLAYERS = [ALICE, BOB, CHARLES, DICK]
+RESULT = [
+    [('1830', [ALICE, BOB, CHARLES, DICK])],
+    [('1860', [ALICE, BOB, CHARLES, DICK])],
+]
+
+
+def test_metrics_by_player_session_and_game(games):
+    r = Report(games, PLAYERS, SESSIONS, RESULT, ['1830', '1860'])
+
+    assert (r.totals['satisfied'], r.totals['plausible']) == satisfied_interests(
+        RESULT, PLAYERS, ['1830', '1860'], SESSIONS,
+    )
+    assert r.totals['satisfied'] == 5
+    assert [p['satisfied'] for p in r.players] == [2, 1, 1, 1]
+    assert [p['plausible'] for p in r.players] == [2, 1, 1, 1]
+    assert r.players[1]['unserved'] == []
+    assert [s['seats'] for s in r.sessions] == [4, 4]
+
+    by_game = {g['game']: g for g in r.games}
+    assert by_game['1830']['satisfied'] == 3
+    assert by_game['1830']['interested'] == 3
+    assert by_game['1830']['fill'] == pytest.approx(4 / games.max_players('1830', SESSIONS[0]))
+    assert by_game['1860']['popularity'] == pytest.approx(games.popularity('1860', 4))
+    assert r.totals['popularity'] == pytest.approx(
+        games.popularity('1830', 4) + games.popularity('1860', 4)
+    )
+
+
+def test_unserved_interests():
+    from schedule import GameDatabase
+
+    r = Report(GameDatabase({}), PLAYERS, SESSIONS[:1], RESULT[:1], ['1830', '1860'])
+
+    assert [p['unserved'] for p in r.players] == [['1860'], [], ['1860'], []]
+    assert {g['game']: g['unserved'] for g in r.games} == {'1830': 0, '1860': 2}
+
+
+def test_formats(games):
+    r = Report(games, PLAYERS, SESSIONS, RESULT, ['1830', '1860'])
+
+    f = io.StringIO()
+    r.write(f, 'json')
+    assert json.loads(f.getvalue())['totals']['satisfied'] == 5
+
+    f = io.StringIO()
+    r.write(f, 'csv', 'games')
+    rows = list(csv.DictReader(io.StringIO(f.getvalue())))
+    assert [row['game'] for row in rows] == ['1830', '1860']
+
+    f = io.StringIO()
+    r.write(f, 'text')
+    assert f.getvalue().startswith('Satisfied 5 out of 5')
+
+
+def test_large_schedules_are_quick(games):
+    players = [player(f'P{n}', interests=['1830', '1817']) for n in range(5000)]
+    result = [
+        [('1830' if t % 2 else '1817', players[t * 5:t * 5 + 5]) for t in range(1000)]
+        for _ in range(2)
+    ]
+    start = time.perf_counter()
+    r = Report(games, players, SESSIONS, result, ['1830', '1817'])
+
+    assert r.totals['seats'] == 10000
+    assert time.perf_counter() - start < 1
+
+
+def test_packed_tables_are_filled_against_their_slot(games):
+    result = [[(0, '1830', PLAYERS), (240, '1860', PLAYERS)]]
+
+    r = Report(games, PLAYERS, SESSIONS[1:], result, ['1830', '1860'])
+    by_game = {g['game']: g for g in r.games}
+
+    # 1830 takes longer with more players: only 4 fit in 240 minutes
+    assert by_game['1830']['capacity'] == 4
+    assert by_game['1830']['fill'] == 1.0
+    assert r.sessions[0]['capacity'] == 8
@@ -0,0 +1,91 @@
+from robust import (
+    RobustSchedule, ScenarioCache, best_buffer, repair, sample_scenarios, solve_base, summarise,
+)
+from schedule import result_to_json
+
+
+def session(**kwargs):
+    return {'length': 600, **kwargs}
+
+
+def players():
+    return [
+        {'name': n, 'owns': [], 'interests': ['1830']} for n in 'ABCDEFG'
+    ] + [
+        {'name': 'H', 'owns': ['1830', '1860'], 'interests': ['1860']},
+    ]
+
+
+def test_scenarios_are_reproducible_and_extendable():
+    ps = players()
+    ps[0]['no_show'] = 1.0
+    ps[1]['sessions'] = [1]
+
+    scenarios = sample_scenarios(ps, 2, 0.2, 10, seed=3)
+
+    assert sample_scenarios(ps, 2, 0.2, 10, seed=3) == scenarios
+    extra = sample_scenarios(ps, 2, 0.2, 12, seed=3, start=10)
+    assert extra == sample_scenarios(ps, 2, 0.2, 12, seed=3)[10:]
+    assert all(0 in absent for s in scenarios for absent in s)
+    assert all(1 not in s[0] for s in scenarios)
+
+
+def test_buffered_base_plans_tables_above_their_minimum(games):
+    result = solve_base(games, players(), [session()], ['1830'], buffer=1)
+
+    assert all(len(ps) >= games.min_players(game) + 1 for game, ps in result[0])
+
+
+def test_repair_moves_players_from_broken_tables(games):
+    base = [[
+        {'game': '1830', 'players': ['A', 'B', 'C', 'D']},
+        {'game': '1860', 'players': ['E', 'F', 'G', 'H']},
+    ]]
+
+    # Two of the 1860 players are missing, so the rest must move.
+    result = repair(games, players(), [session()], ['1830'], 10, base, [[4, 5]], 0.5)
+
+    assert result['feasible']
+    assert result['moved'] == 2
+
+
+def test_nobody_moves_from_an_optimal_base_if_everyone_turns_up(games):
+    base = result_to_json(solve_base(games, players(), [session()], ['1830']))
+    result = repair(games, players(), [session()], ['1830'], 10, base, [[]], 0.5)
+
+    assert result['moved'] == 0
+
+
+def test_robust_schedule_only_solves_new_scenarios(games):
+    cache = ScenarioCache()
+    args = (games, players(), [session()], ['1830'])
+
+    r = RobustSchedule(*args, scenarios=3, no_show=0.2, cache=cache, processes=2)
+    r.solve()
+
+    assert r.solved == 3 * len(r.bases)
+    assert set(r.expected) == set(r.bases)
+    assert (r.feasible[r.buffer], r.expected[r.buffer]) == max(
+        (r.feasible[b], r.expected[b]) for b in r.bases
+    )
+
+    r = RobustSchedule(*args, scenarios=5, no_show=0.2, cache=cache, processes=2)
+    result = r.solve()
+
+    assert r.solved == 2 * len(r.bases)
+    assert result_to_json(result) == result_to_json(r.bases[r.buffer])
+
+
+def test_unrepairable_scenarios_count_against_a_base():
+    # Repairs can score below zero, but still beat no repair at all
+    repaired = {'objective': -1.46, 'moved': 3, 'feasible': True}
+    unrepairable = {'objective': None, 'moved': None, 'feasible': False}
+    good = {'objective': 5.0, 'moved': 0, 'feasible': True}
+
+    assert summarise([repaired, repaired]) == (1.0, -1.46)
+    assert summarise([unrepairable, good]) == (0.5, 5.0)
+    assert summarise([unrepairable]) == (0.0, None)
+
+    assert best_buffer({0: [unrepairable, good], 1: [repaired, repaired]}) == 1
+    assert best_buffer({0: [unrepairable], 1: [unrepairable]}) == 0
+    assert best_buffer({0: [repaired, good], 1: [good, good]}) == 1
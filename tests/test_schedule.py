@@ -1,49 +1,7 @@
 import pytest
 
-from schedule import GameDatabase, Schedule
-
-
-@pytest.fixture
-def games():
-    return GameDatabase({
-        '1817': {
-            'name': '1817',
-            'min_players': 3,
-            'max_players': 6,
-            'min_playtime': 360,
-            'max_playtime': 540,
-            'popularity': {
-                '3': 0.5,
-                '4': 1.0,
-                '5': 1.0,
-                '6': 1.0,
-            }
-        },
-        '1830': {
-            'name': '1830',
-            'min_players': 3,
-            'max_players': 6,
-            'min_playtime': 180,
-            'max_playtime': 360,
-            'popularity': {
-                '3': 1.0,
-                '4': 1.0,
-                '5': 1.0,
-                '6': 1.0,
-            }
-        },
-        '1860': {
-            'name': '1860',
-            'min_players': 3,
-            'max_players': 4,
-            'min_playtime': 240,
-            'max_playtime': 240,
-            'popularity': {
-                '3': 1.0,
-                '4': 0.5,
-            }
-        },
-    })
+from domain import Table
+from schedule import InfeasibleError, Schedule
 
 
 def session(**kwargs):
@@ -206,3 +164,140 @@ def test_player_count_popularity_figures_in_objective_function(games):
     by_game = {g: p for g, p in result[0]}
 
     assert len(by_game['1817']) == 6
+
+
+def test_symmetry_breaking_uses_copies_in_order(games):
+    players = [
+        {'name': 'Alice', 'owns': ['1830'], 'interests': ['1830']},
+        {'name': 'Bob', 'owns': ['1830'], 'interests': ['1830']},
+        {'name': 'Charles', 'owns': ['1830'], 'interests': []},
+        {'name': 'Dick', 'owns': [], 'interests': []},
+        {'name': 'Eric', 'owns': [], 'interests': []},
+        {'name': 'Fred', 'owns': [], 'interests': []},
+        {'name': 'Georgie', 'owns': [], 'interests': []},
+    ]
+
+    s = Schedule(games, players, [session()], symmetry_breaking=True)
+    result = s.solve()
+
+    assert [x for x, _ in result[0]] == ['1830', '1830']
+    assert s.games_played[0][0][0].varValue == 1
+    assert s.games_played[0][1][0].varValue == 1
+    assert s.games_played[0][2][0].varValue == 0
+
+
+def test_too_few_seats_is_rejected_before_solving(games):
+    players = [{'name': n, 'owns': [], 'interests': []} for n in 'ABCDEFG']
+    players[0]['owns'] = ['1860']
+
+    with pytest.raises(InfeasibleError) as e:
+        Schedule(games, players, [session()], table_limit=1)
+
+    assert e.value.reasons == ["Session 0: 7 players but only 4 seats at 1 tables"]
+
+
+def test_no_game_fitting_a_short_session_is_rejected_before_solving(games):
+    players = [{'name': n, 'owns': ['1860'], 'interests': []} for n in 'ABC']
+
+    with pytest.raises(InfeasibleError) as e:
+        Schedule(games, players, [session(name='Friday', length=120)])
+
+    assert e.value.reasons == ["Session Friday: no game fits in 120 minutes for 3 players"]
+
+
+def test_too_few_titles_to_play_once_is_rejected_before_solving(games):
+    players = [{'name': n, 'owns': [], 'interests': []} for n in 'ABC']
+    players[0]['owns'] = ['1860']
+
+    with pytest.raises(InfeasibleError) as e:
+        Schedule(games, players, [session(), session()])
+
+    assert len(e.value.reasons) == 3
+    assert e.value.reasons[0] == (
+        "Player A: attends 2 sessions but only 1 different games are available to them"
+    )
+
+
+def test_infeasible_model_is_diagnosed(games):
+    players = [{'name': n, 'owns': [], 'interests': []} for n in 'ABCDE']
+    players[0]['owns'] = ['1860']
+    players[1]['owns'] = ['1860']
+
+    s = Schedule(games, players, [session()])
+
+    with pytest.raises(InfeasibleError) as e:
+        s.solve()
+
+    assert len(e.value.reasons) == 1
+    assert e.value.reasons[0].startswith("Session 0: player ")
+    assert e.value.reasons[0].endswith(" cannot be seated")
+
+
+def test_staged_objectives_keep_earlier_stages_optimal(games):
+    def players():
+        return [
+            {'name': 'Alice', 'owns': ['1817'], 'interests': ['1817', '1830']},
+            {'name': 'Bob', 'owns': ['1830'], 'interests': ['1817', '1830']},
+            {'name': 'Charles', 'owns': ['1860'], 'interests': ['1817']},
+            {'name': 'Dick', 'owns': [], 'interests': ['1860']},
+            {'name': 'Eric', 'owns': [], 'interests': ['1830', '1860']},
+            {'name': 'Fred', 'owns': [], 'interests': ['1817', '1860']},
+        ]
+
+    single = Schedule(games, players(), [session(), session()])
+    single.solve()
+
+    staged = Schedule(games, players(), [session(), session()])
+    result = staged.solve_staged()
+
+    assert list(staged.stage_values) == ['interests', 'fairness', 'popularity']
+    assert abs(staged.stage_values['interests'] - single.interests_objective().value()) < 1e-4
+
+    satisfaction = {p['name']: 0 for p in players()}
+    for tables in result:
+        for game, ps in tables:
+            for p in ps:
+                satisfaction[p['name']] += game in p['interests']
+
+    worst_off = min(
+        satisfaction[p['name']] / min(len(p['interests']), 2) for p in players()
+    )
+
+    assert abs(worst_off - staged.stage_values['fairness']) < 1e-4
+
+    # The model is left as it was, so it can be staged or solved again
+    values = staged.stage_values
+    staged.solve_staged()
+    assert staged.stage_values == pytest.approx(values)
+    staged.solve()
+    assert abs(staged.p.objective.value() - single.p.objective.value()) < 1e-4
+
+
+def test_tables_refer_to_players_and_copies_by_id(games):
+    players = [
+        {'name': 'Alice', 'owns': [], 'interests': ['1817']},
+        {'name': 'Bob', 'owns': ['1817'], 'interests': ['1817', '1849']},
+        {'name': 'Charles', 'owns': ['1830'], 'interests': ['1830']},
+    ]
+
+    s = Schedule(games, players, [session()])
+    s.solve()
+
+    assert s.tables() == [Table(0, 0, [0, 1, 2])]
+    assert 'sessions' not in players[0]
+
+
+def test_sessions_are_named_in_reasons(games):
+    players = [{'name': n, 'owns': ['1830'], 'interests': []} for n in 'AB']
+
+    with pytest.raises(InfeasibleError, match='Session Friday: no game fits in 60 minutes'):
+        Schedule(games, players, [{'name': 'Friday', 'length': 60}])
+
+    s = Schedule(games, players + [{'name': 'C', 'owns': [], 'interests': []}], [session()])
+    assert [(x.name, x.length) for x in s.timetable] == [('0', 600)]
+
+
+def test_popularity_is_zero_below_min_players_and_capped_at_max(games):
+    assert games.popularity('1830', 2) == 0
+    assert games.popularity('1830', 3) > 0
+    assert games.popularity('1830', 7) == games.popularity('1830', 6)
@@ -0,0 +1,117 @@
+import json
+from pathlib import Path
+import threading
+
+import pytest
+
+from service import Service, ServiceClient, make_server
+
+
+SAMPLE = Path(__file__).parent.parent / 'sample'
+
+
+@pytest.fixture
+def client(games):
+    service = Service(games, workers=1, queue_size=4)
+    service.start()
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield ServiceClient(f'http://127.0.0.1:{server.server_address[1]}')
+
+    server.shutdown()
+    server.server_close()
+    service.stop()
+
+
+def players():
+    return [
+        {'name': 'Alice', 'owns': [], 'interests': ['1817']},
+        {'name': 'Bob', 'owns': ['1817'], 'interests': ['1817', '1849']},
+        {'name': 'Charles', 'owns': ['1830'], 'interests': ['1830']},
+    ]
+
+
+def test_job_is_solved(client):
+    job = client.submit(players(), [{'length': 600}])
+
+    assert job['status'] == 'queued'
+
+    statuses = [j['status'] for j in client.events(job['id'])]
+    result = client.job(job['id'])['result']
+
+    assert statuses[-1] == 'done'
+    assert result['sessions'] == [
+        [{'game': '1817', 'players': ['Alice', 'Bob', 'Charles']}],
+    ]
+
+
+def test_infeasible_job_reports_reasons(client):
+    job = client.wait(client.submit(players()[:2], [{'length': 600}])['id'])
+
+    assert job['status'] == 'failed'
+    assert job['reasons'] == ["Session 0: 2 players is fewer than the 3 needed by any game"]
+
+
+def test_running_job_can_be_cancelled(client):
+    with open(SAMPLE / 'players.json') as f:
+        sample_players = json.load(f)
+
+    with open(SAMPLE / 'sessions.json') as f:
+        sample_sessions = json.load(f)
+
+    job = client.submit(sample_players, sample_sessions)
+
+    for event in client.events(job['id']):
+        if event['status'] == 'running':
+            client.cancel(job['id'])
+
+    assert event['status'] == 'cancelled'
+
+    assert client.job(job['id'])['status'] == 'cancelled'
+
+
+def test_invalid_job_is_rejected(client):
+    with pytest.raises(RuntimeError, match='list of sessions'):
+        client.submit(players(), None)
+
+
+def test_only_recent_finished_jobs_are_kept(games):
+    service = Service(games, workers=1, queue_size=4, keep_finished=1)
+    service.start()
+    first = service.submit({'players': players(), 'sessions': [{'length': 600}]})
+    second = service.submit({'players': players(), 'sessions': [{'length': 600}]})
+
+    while second.status != 'done':
+        service.wait(second, second.version, timeout=30)
+
+    assert first.status == 'done'
+    assert [job.id for job in service.all_jobs()] == [second.id]
+    service.stop()
+
+
+def test_bad_time_limits_do_not_stop_the_workers(client):
+    for time_limit in ('5', 0, True):
+        with pytest.raises(RuntimeError, match='time_limit'):
+            client.submit(players(), [{'length': 600}], time_limit=time_limit)
+
+    job = client.wait(client.submit(players(), [{'length': 600}], time_limit=5)['id'])
+
+    assert job['status'] == 'done'
+
+
+def test_jobs_that_break_a_worker_fail(games):
+    service = Service(games, workers=1, queue_size=4)
+    service.start()
+    # Too long to wait for
+    broken = service.submit({
+        'players': players(), 'sessions': [{'length': 600}], 'time_limit': 1e300,
+    })
+    good = service.submit({'players': players(), 'sessions': [{'length': 600}]})
+
+    while good.status != 'done':
+        service.wait(good, good.version, timeout=30)
+
+    assert broken.status == 'failed'
+    service.stop()
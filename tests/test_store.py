@@ -0,0 +1,98 @@
+from store import ScheduleStore
+
+
+SESSIONS = [{'name': 'Friday', 'length': 300}, {'name': 'Saturday', 'length': 600}]
+
+
+def player(name, owns=(), interests=()):
+    return {'name': name, 'owns': list(owns), 'interests': list(interests)}
+
+
+ALICE = player('Alice', ['1830'], ['1830'])
+BOB = player('Bob', interests=['1817'])
+CHARLES = player('Charles')
+DICK = player('Dick', interests=['1830'])
+
+
+def first_run():
+    return [
+        [('1830', [ALICE, BOB, CHARLES])],
+        [('1817', [ALICE, BOB, CHARLES]), ('1830', [DICK])],
+    ]
+
+
+def test_player_schedule():
+    store = ScheduleStore(':memory:')
+    store.add_run(first_run(), SESSIONS)
+
+    assert store.player_schedule('Alice') == [
+        ('Friday', '1830', None, ['Alice', 'Bob', 'Charles']),
+        ('Saturday', '1817', None, ['Alice', 'Bob', 'Charles']),
+    ]
+    assert store.player_schedule('Nobody') == []
+
+
+def test_game_tables_by_session_name_or_index():
+    store = ScheduleStore(':memory:')
+    store.add_run(first_run(), SESSIONS)
+
+    assert store.game_tables('1830') == [
+        ('Friday', '1830', None, ['Alice', 'Bob', 'Charles']),
+        ('Saturday', '1830', None, ['Dick']),
+    ]
+    assert store.game_tables('1830', 'Saturday') == [('Saturday', '1830', None, ['Dick'])]
+    assert store.game_tables('1830', 0) == [('Friday', '1830', None, ['Alice', 'Bob', 'Charles'])]
+
+
+def test_runs_are_kept_side_by_side_and_diffed(tmp_path):
+    path = str(tmp_path / 'schedule.db')
+    store = ScheduleStore(path)
+    a = store.add_run(first_run(), SESSIONS, label='first', objective=3.0)
+    store.close()
+
+    store = ScheduleStore(path)
+    b = store.add_run(
+        [
+            [('1830', [ALICE, BOB, CHARLES])],
+            [('1817', [ALICE, BOB, DICK])],
+        ],
+        SESSIONS,
+        label='second',
+    )
+
+    assert [(run, label) for run, _, label, _ in store.runs()] == [(a, 'first'), (b, 'second')]
+    assert store.player_schedule('Dick', run=a) == [('Saturday', '1830', None, ['Dick'])]
+    assert store.player_schedule('Dick') == [('Saturday', '1817', None, ['Alice', 'Bob', 'Dick'])]
+    assert store.diff(a, b) == [
+        ('Charles', 'Saturday', None, '1817', None),
+        ('Dick', 'Saturday', None, '1830', '1817'),
+    ]
+
+
+def test_packed_tables_keep_their_start_time():
+    store = ScheduleStore(':memory:')
+    store.add_run([[(0, '1830', [ALICE]), (240, '1817', [ALICE])]], SESSIONS[1:])
+
+    assert [start for _, _, start, _ in store.player_schedule('Alice')] == [0, 240]
+
+
+def test_packed_runs_are_diffed_table_by_table():
+    def packed(later):
+        return [[
+            (0, '1830', [ALICE, BOB, CHARLES]),
+            (0, '1817', [DICK]),
+            (240, later, [ALICE, BOB, CHARLES]),
+            (240, '1830', [DICK]),
+        ]]
+
+    store = ScheduleStore(':memory:')
+    a = store.add_run(packed('1817'), SESSIONS[1:])
+    b = store.add_run(packed('1817'), SESSIONS[1:])
+    c = store.add_run(packed('1860'), SESSIONS[1:])
+
+    assert store.diff(a, b) == []
+    assert store.diff(a, c) == [
+        ('Alice', 'Saturday', 240, '1817', '1860'),
+        ('Bob', 'Saturday', 240, '1817', '1860'),
+        ('Charles', 'Saturday', 240, '1817', '1860'),
+    ]
@@ -0,0 +1,83 @@
+import io
+
+import pytest
+
+import streaming
+from evaluate import Evaluator
+from schedule import InfeasibleError, Schedule
+
+
+def session(**kwargs):
+    return {'length': 600, **kwargs}
+
+
+def players():
+    return [
+        {'name': 'Alice', 'owns': ['1817'], 'interests': ['1817']},
+        {'name': 'Bob', 'owns': ['1830'], 'interests': ['1817', '1830']},
+        {'name': 'Charles', 'owns': ['1860'], 'interests': ['1830']},
+        {'name': 'Dick', 'owns': [], 'interests': ['1817', '1860']},
+        {'name': 'Eric', 'owns': [], 'interests': ['1830']},
+        {'name': 'Fred', 'owns': [], 'interests': ['1860']},
+        {'name': 'Georgie', 'owns': [], 'interests': ['1817', '1830']},
+    ]
+
+
+def test_lp_file_has_a_column_per_variable(games):
+    s = Schedule(games, players(), [session(), session()], build_model=False)
+    f = io.StringIO()
+    index = streaming.write_lp(s, f)
+    full = Schedule(games, players(), [session(), session()])
+
+    assert index.count == len(full.p.variables())
+    assert f.getvalue().count(' r') == len(full.p.constraints)
+
+
+@pytest.mark.parametrize('symmetry_breaking', [False, True])
+def test_streaming_matches_the_full_model(games, symmetry_breaking):
+    sessions = [session(), session(length=240), session()]
+    full = Schedule(games, players(), sessions, table_limit=2, symmetry_breaking=symmetry_breaking)
+    full.solve()
+    s = Schedule(
+        games, players(), sessions, table_limit=2,
+        symmetry_breaking=symmetry_breaking, build_model=False,
+    )
+
+    result, objective = streaming.solve(s)
+    e = Evaluator(games, players(), sessions, result, table_limit=2)
+
+    assert objective == pytest.approx(full.p.objective.value())
+    assert e.score == pytest.approx(objective)
+    assert e.violations == {}
+
+
+def test_infeasible_problems_are_diagnosed(games):
+    players = [{'name': n, 'owns': [], 'interests': []} for n in 'ABCDE']
+    players[0]['owns'] = ['1860']
+    players[1]['owns'] = ['1860']
+    s = Schedule(games, players, [session()], build_model=False)
+
+    with pytest.raises(InfeasibleError) as e:
+        streaming.solve(s)
+
+    assert len(e.value.reasons) == 1
+    assert e.value.reasons[0].endswith(" cannot be seated")
+
+
+def test_best_schedule_is_kept_when_out_of_time(games, tmp_path):
+    s = Schedule(games, players(), [session(), session()], build_model=False)
+    lp = tmp_path / 'schedule.lp'
+
+    with open(lp, 'w') as f:
+        index = streaming.write_lp(s, f)
+
+    status, values = streaming.solve_lp_file(str(lp))
+    expected, objective = streaming.read_result(s, index, status, values)
+    stopped = f"Stopped on time - objective value {objective}"
+
+    assert streaming.read_result(s, index, stopped, values) == (expected, objective)
+
+    with pytest.raises(RuntimeError):
+        streaming.read_result(
+            s, index, "Stopped on time (no integer solution - continuous used)", values,
+        )
@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from registrations import Registrations
+from schedule import GameDatabase
+from tools import load_result
+
+
+ROOT = Path(__file__).parent.parent
+
+# Run a command line tool, then report which slow modules it imported.
+RUN = """
+import os, runpy, sys
+sys.argv = sys.argv[1:]
+sys.path.insert(0, os.path.dirname(sys.argv[0]))
+try:
+    runpy.run_path(sys.argv[0], run_name='__main__')
+except SystemExit as e:
+    code = e.code
+else:
+    code = 0
+heavy = ('pulp.pulp', 'numpy', 'faker', 'boardgamegeek', 'requests')
+print('IMPORTED', [m for m in heavy if m in sys.modules])
+sys.exit(code)
+"""
+
+
+@pytest.fixture
+def inputs(tmp_path):
+    players = [
+        {'name': 'Alice', 'owns': ['1830'], 'interests': ['1830']},
+        {'name': 'Bob', 'owns': [], 'interests': ['1830']},
+        {'name': 'Charles', 'owns': [], 'interests': []},
+    ]
+    schedule = [[{'game': '1830', 'players': ['Alice', 'Bob', 'Charles']}]]
+
+    for name, data in (
+            ('games.json', []),
+            ('players.json', players),
+            ('sessions.json', [{'name': 'Sat', 'length': 600}]),
+            ('schedule.json', schedule),
+    ):
+        (tmp_path / name).write_text(json.dumps(data))
+
+    return tmp_path
+
+
+def run(*args, cwd):
+    p = subprocess.run(
+        [sys.executable, '-c', RUN, str(ROOT / 'tools.py')] + [str(a) for a in args],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    output, imported = p.stdout.rsplit('IMPORTED ', 1)
+
+    return p.returncode, output, imported.strip()
+
+
+@pytest.mark.parametrize(
+    'command', [['validate'], ['report', 'schedule.json'], ['render', 'schedule.json']],
+)
+def test_commands_do_not_import_the_solver(inputs, command):
+    code, _, imported = run(
+        *command,
+        '--games', 'games.json', '--players', 'players.json', '--sessions', 'sessions.json',
+        cwd=inputs,
+    )
+
+    assert code == 0
+    assert imported == '[]'
+
+
+def test_render_prints_the_schedule(inputs):
+    _, output, _ = run(
+        'render', 'schedule.json', '--games', 'games.json', '--players', 'players.json',
+        '--sessions', 'sessions.json', cwd=inputs,
+    )
+
+    assert output == "==== Session Sat ====\n## 1830 ##\nAlice**\nBob*\nCharles\n\n\n"
+
+
+def test_report_lists_violations(inputs):
+    (inputs / 'schedule.json').write_text(json.dumps(
+        [[{'game': '1830', 'players': ['Alice', 'Bob']}]],
+    ))
+    code, output, _ = run(
+        'report', 'schedule.json', '--games', 'games.json', '--players', 'players.json',
+        '--sessions', 'sessions.json', cwd=inputs,
+    )
+
+    assert code == 1
+    assert "Satisfied 2 out of 2" in output
+    assert "Session 0: Charles is at 0 tables" in output
+
+
+def test_validate_reports_infeasible_inputs(inputs):
+    (inputs / 'sessions.json').write_text(json.dumps([{'name': 'Sat', 'length': 60}]))
+    code, output, _ = run(
+        'validate',
+        '--games', 'games.json', '--players', 'players.json', '--sessions', 'sessions.json',
+        cwd=inputs,
+    )
+
+    assert code == 1
+    assert "Session Sat: no game fits in 60 minutes for 3 players" in output
+
+
+def test_unknown_players_in_the_schedule_are_an_error(inputs):
+    (inputs / 'schedule.json').write_text(json.dumps(
+        [[{'game': '1830', 'players': ['Alice', 'Bob', 'Dick']}]],
+    ))
+    code, output, _ = run(
+        'report', 'schedule.json', '--games', 'games.json', '--players', 'players.json',
+        '--sessions', 'sessions.json', cwd=inputs,
+    )
+
+    assert code == 1
+    assert 'Traceback' not in output
+
+    with open(inputs / 'players.json') as f:
+        registrations = Registrations(GameDatabase({}), [{'length': 600}])
+        registrations.read_json(f)
+
+    with pytest.raises(ValueError, match="Session 0 table 0: unknown player 'Dick'"):
+        load_result(inputs / 'schedule.json', registrations)
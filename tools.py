@@ -0,0 +1,202 @@
+"""Check inputs and schedules from the command line, without the solver.
+
+These commands never import PuLP (or the sample/game data dependencies), so
+they start in a fraction of the time `schedule.py` takes to solve:
+
+    validate  check a players file against the games and sessions, and run
+              the quick feasibility checks
+    report    score a schedule file, and list rule violations and how many
+              interests it satisfies
+    render    print a schedule file in the same format as schedule.py
+    startup   time how long each command line tool takes to start
+"""
+from argparse import ArgumentParser
+import json
+import os
+import subprocess
+import sys
+import time
+
+from evaluate import Evaluator
+from registrations import Registrations
+from schedule import GameDatabase, InfeasibleError, print_schedule, satisfied_interests
+
+
+STARTUP_COMMANDS = [
+    ['tools.py', '--help'],
+    ['schedule.py', '--help'],
+    ['evaluate.py', '--help'],
+    ['registrations.py', '--help'],
+    ['service.py', '--help'],
+]
+
+
+def load(args):
+    """Returns the games database, sessions and validated registrations"""
+
+    with open(args.sessions) as f:
+        sessions = json.load(f)
+
+    games_db = GameDatabase.from_file(args.games)
+
+    return games_db, sessions, Registrations.from_file(args.players, games_db, sessions)
+
+
+def load_result(path, registrations):
+    """Read a schedule json file, with player dicts in place of names.
+    Raises ValueError for players not in the registrations
+
+    """
+    by_name = {p['name']: p for p in registrations.players}
+
+    with open(path) as f:
+        schedule = json.load(f)
+
+    result = []
+
+    for s, tables in enumerate(schedule):
+        result.append([])
+
+        for t, table in enumerate(tables):
+            for name in table['players']:
+                if name not in by_name:
+                    raise ValueError(f"Session {s} table {t}: unknown player {name!r}")
+
+            result[s].append((table['game'], [by_name[name] for name in table['players']]))
+
+    return result
+
+
+def validate(args):
+    games_db, sessions, r = load(args)
+
+    for line_no, message in r.warnings:
+        print(f"{args.players}:{line_no}: warning: {message}")
+
+    for line_no, message in r.errors:
+        print(f"{args.players}:{line_no}: error: {message}")
+
+    print(f"{len(r.players)} players, {len(r.errors)} errors, {len(r.warnings)} warnings")
+
+    try:
+        r.schedule(args.shared_games, args.table_limit, build_model=False)
+    except InfeasibleError as e:
+        print(e)
+        return 1
+
+    return 1 if r.errors else 0
+
+
+def report(args):
+    games_db, sessions, r = load(args)
+    result = load_result(args.schedule, r)
+    e = Evaluator(
+        games_db,
+        r.players,
+        sessions,
+        result,
+        shared_games=args.shared_games,
+        table_limit=args.table_limit,
+    )
+    available = set(args.shared_games) | {g for p in r.players for g in p['owns']}
+    satisfied, plausible = satisfied_interests(result, r.players, available, sessions)
+
+    print(f"Satisfied {satisfied} out of {plausible}")
+    print(f"Objective function: {e.score}")
+
+    for message in e.violations.values():
+        print(f"Violation: {message}")
+
+    return 1 if e.violations else 0
+
+
+def render(args):
+    _, sessions, r = load(args)
+    print_schedule(load_result(args.schedule, r), sessions)
+
+    return 0
+
+
+def startup(args):
+    """Time each command's startup, best of `args.repeat` runs"""
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    timings = {}
+
+    for command in STARTUP_COMMANDS:
+        best = None
+
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable] + command,
+                cwd=here,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        timings[' '.join(command)] = best
+        print(f"{' '.join(command):<28}{best * 1000:8.1f} ms")
+
+    if args.output:
+        with open(args.output, 'a') as f:
+            f.write(json.dumps({'time': time.time(), 'startup': timings}) + '\n')
+
+    return 0
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description='Check inputs and schedules without the solver')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_inputs(subparser):
+        subparser.add_argument(
+            '--games', metavar='FILE', default='games.json', help='Games database json',
+        )
+        subparser.add_argument(
+            '--players', metavar='FILE', default='sample/players.json',
+            help='Players, as .json, .jsonl or .csv',
+        )
+        subparser.add_argument(
+            '--sessions', metavar='FILE', default='sample/sessions.json',
+            help='Session info json file',
+        )
+        subparser.add_argument(
+            '--table-limit', metavar='N', default=10, type=int, help='Tables per session',
+        )
+        subparser.add_argument(
+            '--shared-games', nargs='*', metavar='GAMES', default=[], help='Shared games',
+        )
+
+    subparser = subparsers.add_parser('validate', help='Check players and sessions')
+    add_inputs(subparser)
+    subparser.set_defaults(run=validate)
+
+    for name, run, help in (
+            ('report', report, 'Score a schedule file and check it against the rules'),
+            ('render', render, 'Print a schedule file'),
+    ):
+        subparser = subparsers.add_parser(name, help=help)
+        add_inputs(subparser)
+        subparser.add_argument(
+            'schedule', metavar='FILE', help='Schedule json, as written by --output',
+        )
+        subparser.set_defaults(run=run)
+
+    subparser = subparsers.add_parser('startup', help='Benchmark command line startup time')
+    subparser.add_argument(
+        '--repeat', metavar='N', default=5, type=int, help='Runs of each, taking the fastest',
+    )
+    subparser.add_argument(
+        '--output', metavar='FILE', help='Append the timings to this file, as a line of json',
+    )
+    subparser.set_defaults(run=startup)
+
+    args = parser.parse_args()
+
+    try:
+        sys.exit(args.run(args))
+    except ValueError as error:
+        sys.exit(f"Error: {error}")